@@ -1,14 +1,27 @@
+import time
+# Startup phases are timed from here (see mark_startup_phase)
+STARTUP_BEGAN = time.perf_counter()
 import os
 import csv
-import time
+import asyncio
+import json
+import sqlite3
+import heapq
+import itertools
 import threading
-from flask import Flask, jsonify, request, send_from_directory, redirect, session
-import spotipy
-from spotipy.oauth2 import SpotifyOAuth
+import atexit
+import signal
+import sys
+from collections import OrderedDict
+from contextlib import contextmanager
+from types import MappingProxyType
+from concurrent.futures import ThreadPoolExecutor
+from flask import Flask, Response, jsonify, request, send_from_directory, redirect, session
 from dotenv import load_dotenv
-from PIL import Image
-import requests
 from io import BytesIO
+from track_store import TrackStore
+from token_manager import TokenManager
+from spotify_async import AsyncSpotify, SpotifyAsyncError, remaining_page_urls
 
 load_dotenv()
 
@@ -16,79 +29,1113 @@ app = Flask(__name__, static_folder='static')
 
 # Configuration
 CSV_FILE = "data/csv/Playlists to Display.csv"
+CACHE_DB_FILE = "data/cache/dashboard_cache.sqlite3"
+# Request budget shared by every Spotify call this process makes
+SPOTIFY_REQUESTS_PER_SECOND = float(os.getenv("SPOTIFY_REQUESTS_PER_SECOND", "4"))
+SPOTIFY_REQUEST_BURST = int(os.getenv("SPOTIFY_REQUEST_BURST", "8"))
+# After a 429 every request waits out Retry-After, then is retried this many times;
+# back-offs longer than the limit are not retried (the error goes to the caller)
+SPOTIFY_429_RETRIES = int(os.getenv("SPOTIFY_429_RETRIES", "3"))
+SPOTIFY_MAX_RETRY_AFTER_SECONDS = float(os.getenv("SPOTIFY_MAX_RETRY_AFTER_SECONDS", "60"))
+# Number of playlists the cache loader fetches concurrently
+CACHE_WORKERS = int(os.getenv("CACHE_WORKERS", "4"))
+# Most requests the async client keeps open at once (the rate limiter still sets the pace)
+SPOTIFY_MAX_IN_FLIGHT = int(os.getenv("SPOTIFY_MAX_IN_FLIGHT", "8"))
+# Longest a check-playlists request waits on live checks of uncached playlists
+LIVE_CHECK_BUDGET_SECONDS = float(os.getenv("LIVE_CHECK_BUDGET_SECONDS", "0.8"))
+# How often the backend polls Spotify for the current track while paused or idle
+NOW_PLAYING_POLL_SECONDS = float(os.getenv("NOW_PLAYING_POLL_SECONDS", "10"))
+# While a track is playing the next poll is timed to its end; this heartbeat catches skips
+NOW_PLAYING_HEARTBEAT_SECONDS = float(os.getenv("NOW_PLAYING_HEARTBEAT_SECONDS", "30"))
+# Poll this long after the predicted end so Spotify has moved on to the next track
+NOW_PLAYING_END_MARGIN_SECONDS = 0.75
+# Stop polling once no page has asked for the current track for this long
+NOW_PLAYING_IDLE_SECONDS = 60
+# Liked Songs mirror: check for newly liked tracks this often, and re-download everything this often
+LIKED_SONGS_REFRESH_SECONDS = float(os.getenv("LIKED_SONGS_REFRESH_SECONDS", "300"))
+LIKED_SONGS_FULL_SYNC_SECONDS = float(os.getenv("LIKED_SONGS_FULL_SYNC_SECONDS", "21600"))
+# Toggles are written to Spotify this long after the last click, so a run of clicks goes out together
+WRITE_BEHIND_DELAY_SECONDS = float(os.getenv("WRITE_BEHIND_DELAY_SECONDS", "1.5"))
+# Most tracks Spotify accepts per playlist write, and per Liked Songs write
+PLAYLIST_WRITE_BATCH_SIZE = 100
+LIKED_SONGS_WRITE_BATCH_SIZE = 50
+# Also cache every playlist in the library (not just the displayed ones), so removing a track
+# only unlikes it when no playlist at all still has it
+LIBRARY_INDEX = os.getenv("LIBRARY_INDEX", "").lower() in ("1", "true", "yes")
+# Album colors kept in memory (the on-disk cache keeps every color ever computed)
+COLOR_CACHE_SIZE = int(os.getenv("COLOR_CACHE_SIZE", "512"))
+# Album track lists kept in memory (all of them are kept on disk)
+ALBUM_CACHE_SIZE = int(os.getenv("ALBUM_CACHE_SIZE", "256"))
+# Refresh the Spotify token this long before it expires (it lasts an hour)
+TOKEN_REFRESH_MARGIN_SECONDS = int(os.getenv("TOKEN_REFRESH_MARGIN_SECONDS", "300"))
+# Outbound HTTP: timeout for every request, and keep-alive connections kept open per host
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT_SECONDS", "10"))
+# Override as "host=size,host=size"; hosts not listed share a small default pool
+HTTP_POOL_SIZES = os.getenv(
+    "HTTP_POOL_SIZES",
+    f"api.spotify.com={CACHE_WORKERS + 4},accounts.spotify.com=2,i.scdn.co=4"
+)
+HTTP_DEFAULT_POOL_SIZE = 4
+# How often to check the display CSVs for edits (they are reloaded without a restart)
+CSV_WATCH_SECONDS = float(os.getenv("CSV_WATCH_SECONDS", "2"))
+# Set to 0 to run without Flask's auto-reloader (it imports the app twice); the desktop app does
+FLASK_USE_RELOADER = os.getenv("FLASK_USE_RELOADER", "1") != "0"
 SCOPE = "user-read-playback-state user-library-read user-library-modify playlist-read-private playlist-read-collaborative playlist-modify-public playlist-modify-private user-read-recently-played"
 
+def build_http_session():
+    """One keep-alive connection pool per host, shared by every outbound request.
+
+    urllib3 pools are thread-safe, so the Spotify client, OAuth token refreshes and
+    cover downloads all reuse warm TLS connections instead of opening their own.
+    Retries stay off here; rate limiting and back-off happen at the Spotify client.
+    """
+    # Imported here so startup doesn't wait on requests; see get_http_session
+    import requests
+    from requests.adapters import HTTPAdapter
+    session = requests.Session()
+    default_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=HTTP_DEFAULT_POOL_SIZE, max_retries=0)
+    session.mount("https://", default_adapter)
+    session.mount("http://", default_adapter)
+    for entry in HTTP_POOL_SIZES.split(","):
+        host, _, size = entry.strip().partition("=")
+        if host and size:
+            session.mount(f"https://{host}/", HTTPAdapter(pool_connections=1, pool_maxsize=int(size), max_retries=0))
+    return session
+
+# Heavy clients are built on first use, so /health answers before they are imported
+http_session = None
+sp = None
+client_lock = threading.Lock()
+
+def get_http_session():
+    global http_session
+    with client_lock:
+        if http_session is None:
+            http_session = build_http_session()
+        return http_session
+
 # Spotify Auth Manager
 # We create a function or object to manage auth
 def get_auth_manager():
-    return SpotifyOAuth(scope=SCOPE, open_browser=False)
-
-sp = spotipy.Spotify(auth_manager=get_auth_manager(), requests_timeout=10, status_retries=0, retries=0)
+    from spotipy.oauth2 import SpotifyOAuth
+    return SpotifyOAuth(scope=SCOPE, open_browser=False, requests_session=get_http_session(), requests_timeout=HTTP_TIMEOUT_SECONDS)
+
+# The user's token, kept in memory and refreshed in the background; use this rather than
+# get_auth_manager() to check or get the token
+token_manager = TokenManager(get_auth_manager, refresh_margin=TOKEN_REFRESH_MARGIN_SECONDS)
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second with bursts of up to `capacity`."""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self):
+        """Take one token and return how many seconds the caller must wait before using it."""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            if self.tokens >= 0:
+                return 0.0
+            return -self.tokens / self.rate
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+
+class RequestGovernor:
+    """Gate for every Spotify request, sync or async.
+
+    The token bucket sets the pace. A 429 anywhere pauses all traffic until its
+    Retry-After has passed, so one rate-limit event doesn't turn into a burst of
+    them from the other threads.
+    """
+
+    def __init__(self, bucket):
+        self.bucket = bucket
+        self.paused_until = 0.0          # time.monotonic() at which the current back-off ends
+        self.rate_limited_count = 0
+        self.last_retry_after = None
+        self.last_rate_limited_at = None  # epoch seconds
+        self.lock = threading.Lock()
+
+    def pause_remaining(self):
+        return max(0.0, self.paused_until - time.monotonic())
+
+    def reserve(self):
+        """Take a token and return the seconds to wait: the rest of any back-off, then the token's wait."""
+        return self.pause_remaining() + self.bucket.reserve()
+
+    def acquire(self):
+        wait = self.reserve()
+        if wait > 0:
+            time.sleep(wait)
+        # A 429 elsewhere may have started a back-off while we waited
+        while (wait := self.pause_remaining()) > 0:
+            time.sleep(wait)
+
+    def backoff(self, retry_after):
+        """Pause all requests for `retry_after` seconds (a 429 came back)."""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+            self.rate_limited_count += 1
+            self.last_retry_after = retry_after
+            self.last_rate_limited_at = time.time()
+        print(f"Spotify rate limit hit. Pausing all requests for {retry_after}s.")
+
+    def state(self):
+        remaining = self.pause_remaining()
+        return {
+            "paused": remaining > 0,
+            "retry_after": round(remaining, 1),
+            "rate_limited_count": self.rate_limited_count,
+            "last_retry_after": self.last_retry_after,
+            "last_rate_limited_at": self.last_rate_limited_at,
+            "requests_per_second": self.bucket.rate,
+        }
 
-# Global Cache for Playlist IDs
-# Map: "Spotify Playlist Name" -> Playlist ID
-playlist_map = {}
-# List of dicts for frontend: { "name": "Dashboard Name", "spotify_name": "Spotify Playlist Name", "id": "..." }
-dashboard_playlists = []
-# Cache for Playlist Tracks: Playlist ID -> Set of Track URIs
-playlist_tracks_cache = {}
+request_governor = RequestGovernor(TokenBucket(SPOTIFY_REQUESTS_PER_SECOND, SPOTIFY_REQUEST_BURST))
+
+def is_rate_limited(error):
+    return getattr(error, 'http_status', None) == 429
+
+def get_spotify():
+    """The shared spotipy client, created (and spotipy imported) on first use."""
+    global sp
+    if sp is None:
+        from spotify_client import RateLimitedSpotify
+        client = RateLimitedSpotify(
+            request_governor,
+            max_retries=SPOTIFY_429_RETRIES,
+            max_retry_after=SPOTIFY_MAX_RETRY_AFTER_SECONDS,
+            auth_manager=token_manager,
+            requests_session=get_http_session(),
+            requests_timeout=HTTP_TIMEOUT_SECONDS,
+            status_retries=0,
+            retries=0
+        )
+        with client_lock:
+            if sp is None:
+                sp = client
+    return sp
+
+# Threads for fetching the remaining pages of a paged spotipy result concurrently
+page_executor = ThreadPoolExecutor(max_workers=SPOTIFY_MAX_IN_FLIGHT, thread_name_prefix="spotify-pages")
+
+def fetch_all_items(first_page):
+    """Every item of a paged spotipy result, in order.
+
+    Once the first page tells us the total, the remaining pages are requested
+    concurrently by offset (the rate limiter still sets the pace).
+    """
+    urls = remaining_page_urls(first_page)
+    items = list(first_page['items'])
+    if urls is None:
+        results = first_page
+        while results['next']:
+            results = get_spotify().next(results)
+            items.extend(results['items'])
+        return items
+    for page in page_executor.map(lambda url: get_spotify().next({'next': url}), urls):
+        items.extend(page['items'])
+    return items
+
+# Event loop thread for the async client used by the bulk read paths
+async_loop = None
+async_loop_lock = threading.Lock()
+
+def get_async_loop():
+    global async_loop
+    with async_loop_lock:
+        if async_loop is None:
+            async_loop = asyncio.new_event_loop()
+            threading.Thread(target=async_loop.run_forever, daemon=True, name="spotify-async").start()
+        return async_loop
+
+def run_async(coro, timeout=None):
+    """Run a coroutine on the async client's loop from a regular thread and wait for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_async_loop()).result(timeout)
+
+async def async_access_token():
+    token = token_manager.cached()
+    if token is None:
+        # First read of the token file, or a refresh the background thread hasn't done yet; keep it off the loop
+        token = await asyncio.to_thread(token_manager.token)
+    if not token:
+        raise SpotifyAsyncError(401, "Not authenticated")
+    return token['access_token']
+
+async_sp = AsyncSpotify(
+    async_access_token,
+    rate_limiter=request_governor,
+    max_in_flight=SPOTIFY_MAX_IN_FLIGHT,
+    timeout=HTTP_TIMEOUT_SECONDS,
+    max_retries=SPOTIFY_429_RETRIES,
+    max_retry_after=SPOTIFY_MAX_RETRY_AFTER_SECONDS
+)
+
+def close_async_client():
+    """Close the async client's session on exit, if it was ever opened."""
+    if async_loop is None or async_sp.session is None:
+        return
+    try:
+        run_async(async_sp.close(), timeout=5)
+    except Exception as e:
+        print(f"Error closing Spotify client session: {e}")
+
+# Registered before the write queue's flush, so it runs after it
+atexit.register(close_async_client)
+
+class PlaylistState:
+    """The page lists as of one load. Never changed once published.
+
+    Loaders build a new state off to the side and publish it by rebinding
+    `playlist_state` in one assignment, so a request handler that reads
+    `playlist_state` once gets lists that belong together without taking a lock.
+    Page entries are dicts for the frontend:
+    { "name": "Dashboard Name", "spotify_name": "Spotify Playlist Name", "id": "..." }
+    (tracker and queue entries also carry "is_divider").
+    """
+
+    def __init__(self, dashboard=(), tracker=(), queue=(), playlist_map=None, version=0):
+        self.dashboard = tuple(dashboard)
+        self.tracker = tuple(tracker)
+        self.queue = tuple(queue)
+        # Map: "Spotify Playlist Name" -> Playlist ID (playlists page)
+        self.playlist_map = MappingProxyType(dict(playlist_map or {}))
+        # Every playlist shown on any page: Playlist ID -> Spotify Playlist Name
+        displayed = {}
+        for pl in self.dashboard + self.tracker + self.queue:
+            if not pl.get('is_divider'):
+                displayed.setdefault(pl['id'], pl['spotify_name'])
+        self.displayed = MappingProxyType(displayed)
+        self.version = version
+
+    def page(self, page):
+        if page == "tracker":
+            return self.tracker
+        if page == "queue":
+            return self.queue
+        return self.dashboard
+
+    def replace(self, dashboard=None, tracker=None, queue=None, playlist_map=None):
+        """A new state with the given lists replaced and the next version, or this one if nothing changed."""
+        state = PlaylistState(
+            self.dashboard if dashboard is None else dashboard,
+            self.tracker if tracker is None else tracker,
+            self.queue if queue is None else queue,
+            self.playlist_map if playlist_map is None else playlist_map,
+            version=self.version + 1,
+        )
+        if (state.dashboard, state.tracker, state.queue, state.playlist_map) == (self.dashboard, self.tracker, self.queue, self.playlist_map):
+            return self
+        return state
+
+# Current PlaylistState; replace it only through publish_playlist_state
+playlist_state = PlaylistState()
+# Serialises publishers so two loaders can't drop each other's update (readers never take it)
+playlist_state_lock = threading.Lock()
+
+def publish_playlist_state(**changes):
+    """Swap in a state with the given lists replaced; returns the published state."""
+    global playlist_state
+    with playlist_state_lock:
+        playlist_state = playlist_state.replace(**changes)
+        return playlist_state
+
+# Cache for Playlist Tracks: Playlist ID -> Track URIs, stored as interned integer IDs
+# (the store also answers Track URI -> Playlist IDs in a single lookup)
+playlist_tracks_cache = TrackStore()
+# Guards playlist_tracks_cache; mutate it only via the helpers below
+cache_lock = threading.RLock()
+# Every playlist in the user's library: Playlist ID -> Spotify Playlist Name (from the latest listing)
+library_playlists = {}
+# Library playlists not indexed at their current snapshot yet, kept up to date as caches
+# and snapshots change so the completeness check doesn't scan the library
+unindexed_playlists = set()
+library_index_lock = threading.Lock()
+# The latest current_user_playlists listing (fetched or restored), or None before the first
+latest_listing = None
 
 # Loading state: tracks whether initial playlist load is still in progress
 # "loading" = still fetching, "done" = finished (success or failure)
 loading_state = "loading"
 
-def populate_playlist_cache():
-    global playlist_tracks_cache
-    # Reduced wait time for faster initial response
-    time.sleep(3)
-    print("Starting background cache population...")
-    
-    count = 0
-    for pl in dashboard_playlists:
-        pid = pl['id']
-        sname = pl['spotify_name']
+# Snapshot IDs: Playlist ID -> snapshot_id from the latest current_user_playlists listing
+playlist_snapshots = {}
+# Snapshot IDs the cached track sets were fetched at: Playlist ID -> snapshot_id
+cached_snapshots = {}
+# Playlists Spotify won't let us read (e.g. followed Spotify-owned ones): Playlist ID -> (HTTP status, snapshot_id)
+# They are tried again once their snapshot changes
+unreadable_playlists = {}
+# Read errors that retrying won't fix
+UNREADABLE_STATUSES = (403, 404)
+
+# On-disk copy of playlist_tracks_cache so a restart can answer checks immediately
+cache_db_lock = threading.Lock()
+
+# Set once the tables exist, so the schema script runs on the first open only
+cache_db_ready = False
+
+@contextmanager
+def cache_db():
+    """Connection to the on-disk cache, holding cache_db_lock while the block runs.
+
+    Commits when the block finishes (rolls back if it raises) and closes the connection.
+    """
+    global cache_db_ready
+    with cache_db_lock:
+        if not cache_db_ready:
+            os.makedirs(os.path.dirname(CACHE_DB_FILE), exist_ok=True)
+        conn = sqlite3.connect(CACHE_DB_FILE, timeout=10)
+        try:
+            if not cache_db_ready:
+                conn.executescript(
+                    "CREATE TABLE IF NOT EXISTS playlist_tracks ("
+                    "playlist_id TEXT PRIMARY KEY, snapshot_id TEXT, track_uris TEXT NOT NULL, updated_at REAL NOT NULL);"
+                    "CREATE TABLE IF NOT EXISTS saved_tracks (track_id TEXT PRIMARY KEY);"
+                    "CREATE TABLE IF NOT EXISTS cache_meta (key TEXT PRIMARY KEY, value TEXT);"
+                    "CREATE TABLE IF NOT EXISTS album_colors (url TEXT PRIMARY KEY, r INTEGER, g INTEGER, b INTEGER);"
+                    "CREATE TABLE IF NOT EXISTS album_tracks (album_id TEXT PRIMARY KEY, track_uris TEXT NOT NULL);"
+                    "CREATE TABLE IF NOT EXISTS playlist_listing ("
+                    "position INTEGER PRIMARY KEY, playlist_id TEXT NOT NULL, name TEXT, snapshot_id TEXT, total INTEGER);"
+                )
+                cache_db_ready = True
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+def set_playlist_tracks(pid, track_uris):
+    """Replace a playlist's cached track set."""
+    with cache_lock:
+        playlist_tracks_cache.set_tracks(pid, track_uris)
+
+def ensure_playlist_cache_entry(pid):
+    """Give a playlist an empty cache entry so toggles are recorded before the loader reaches it."""
+    with cache_lock:
+        playlist_tracks_cache.ensure(pid)
+
+def add_tracks_to_cache(pid, track_uris):
+    """Record tracks added to a cached playlist. Uncached playlists are left for the loader."""
+    with cache_lock:
+        return playlist_tracks_cache.add_tracks(pid, track_uris)
+
+def remove_tracks_from_cache(pid, track_uris):
+    """Record tracks removed from a cached playlist."""
+    with cache_lock:
+        return playlist_tracks_cache.remove_tracks(pid, track_uris)
+
+def playlists_containing(track_uri, state=None):
+    """Displayed playlists (as of `state`, default the current one) whose cache contains the track — a single index lookup."""
+    displayed = (state or playlist_state).displayed
+    with cache_lock:
+        pids = playlist_tracks_cache.playlists_containing(track_uri)
+    return {pid for pid in pids if pid in displayed}
+
+def library_index_complete():
+    """True if every playlist in the library is cached at its current snapshot or can't be read at all."""
+    return bool(library_playlists) and not unindexed_playlists
+
+def note_index_change(pid):
+    """Re-check one library playlist's place in the index after its cache or snapshot changed."""
+    with library_index_lock:
+        if pid not in library_playlists:
+            return
+        if is_playlist_indexed(pid):
+            unindexed_playlists.discard(pid)
+        else:
+            unindexed_playlists.add(pid)
+
+def playlists_containing_anywhere(track_uri):
+    """Playlists containing the track across the whole library when the library index is
+    complete, otherwise across the displayed playlists only."""
+    if LIBRARY_INDEX and library_index_complete():
+        library = library_playlists
+        with cache_lock:
+            pids = playlist_tracks_cache.playlists_containing(track_uri)
+        return {pid for pid in pids if pid in library}
+    return playlists_containing(track_uri)
+
+def save_playlist_tracks(pid, snapshot_id=None):
+    """Write the cached track set for one playlist to disk.
+
+    A set that includes changes not yet written to Spotify is saved without a
+    snapshot, so if they never get there the next start reads the playlist again.
+    """
+    with cache_lock:
+        if pid not in playlist_tracks_cache:
+            return
+        if snapshot_id is not None:
+            cached_snapshots[pid] = snapshot_id
+        track_uris = "\n".join(playlist_tracks_cache.track_uris(pid))
+    saved_snapshot = None if write_queue.has_pending(pid) else cached_snapshots.get(pid)
+    try:
+        with cache_db() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO playlist_tracks (playlist_id, snapshot_id, track_uris, updated_at) VALUES (?, ?, ?, ?)",
+                (pid, saved_snapshot, track_uris, time.time())
+            )
+    except Exception as e:
+        print(f"Error saving playlist cache for {pid}: {e}")
+    note_index_change(pid)
+
+def is_playlist_cache_fresh(pid):
+    """True if the cached track set was fetched at the playlist's current snapshot_id."""
+    snapshot_id = playlist_snapshots.get(pid)
+    return pid in playlist_tracks_cache and snapshot_id is not None and cached_snapshots.get(pid) == snapshot_id
+
+def is_playlist_unreadable(pid):
+    """True if reading the playlist at its current snapshot failed in a way retrying won't fix."""
+    entry = unreadable_playlists.get(pid)
+    return entry is not None and entry[1] == playlist_snapshots.get(pid)
+
+def is_playlist_indexed(pid):
+    """True if there's nothing more the loader can do for the playlist at its current snapshot."""
+    return is_playlist_cache_fresh(pid) or is_playlist_unreadable(pid)
+
+def record_write_snapshot(pid, result):
+    """After one of our own writes, move a fresh cache entry to the snapshot_id Spotify returned."""
+    new_snapshot = result.get('snapshot_id') if isinstance(result, dict) else None
+    if not new_snapshot:
+        return
+    if is_playlist_cache_fresh(pid):
+        playlist_snapshots[pid] = new_snapshot
+        cached_snapshots[pid] = new_snapshot
+        note_index_change(pid)
+
+def restore_playlist_cache():
+    """Load every persisted playlist track set into playlist_tracks_cache (runs synchronously at boot)."""
+    start = time.time()
+    try:
+        with cache_db() as conn:
+            rows = conn.execute("SELECT playlist_id, snapshot_id, track_uris FROM playlist_tracks").fetchall()
+    except Exception as e:
+        print(f"Error restoring playlist cache: {e}")
+        return
+    for pid, snapshot_id, track_uris in rows:
+        set_playlist_tracks(pid, set(track_uris.split("\n")) if track_uris else set())
+        cached_snapshots[pid] = snapshot_id
+    print(f"Restored {len(rows)} cached playlists from disk in {(time.time() - start) * 1000:.0f}ms.")
+
+# Local mirror of the Liked Songs library: set of saved Track IDs
+saved_track_ids = set()
+# False until the mirror has been restored from disk or downloaded, then is_liked comes from memory
+saved_tracks_ready = False
+# When the mirror was last fully downloaded (epoch seconds)
+saved_tracks_synced_at = 0
+# Likes/unlikes made while a full download is running: Track ID -> liked (None when not syncing)
+saved_tracks_sync_changes = None
+saved_tracks_lock = threading.Lock()
+saved_tracks_thread = None
+
+def restore_saved_tracks():
+    """Load the persisted Liked Songs mirror (runs synchronously at boot)."""
+    global saved_tracks_ready, saved_tracks_synced_at
+    try:
+        with cache_db() as conn:
+            rows = conn.execute("SELECT track_id FROM saved_tracks").fetchall()
+            synced = conn.execute("SELECT value FROM cache_meta WHERE key = 'saved_tracks_synced_at'").fetchone()
+    except Exception as e:
+        print(f"Error restoring Liked Songs: {e}")
+        return
+    if synced is None:
+        return
+    with saved_tracks_lock:
+        saved_track_ids.update(row[0] for row in rows)
+        saved_tracks_synced_at = float(synced[0])
+        saved_tracks_ready = True
+    print(f"Restored {len(rows)} Liked Songs from disk.")
+
+def is_track_liked(track_id):
+    """Answer from the Liked Songs mirror, or ask Spotify while the mirror isn't loaded yet."""
+    if saved_tracks_ready:
+        return track_id in saved_track_ids
+    return get_spotify().current_user_saved_tracks_contains([track_id])[0]
+
+def record_liked(track_ids, liked):
+    """Apply a like/unlike to the mirror and its on-disk copy (write_queue sends it to Spotify)."""
+    with saved_tracks_lock:
+        for track_id in track_ids:
+            if liked:
+                saved_track_ids.add(track_id)
+            else:
+                saved_track_ids.discard(track_id)
+            if saved_tracks_sync_changes is not None:
+                saved_tracks_sync_changes[track_id] = liked
+    try:
+        with cache_db() as conn:
+            if liked:
+                conn.executemany("INSERT OR IGNORE INTO saved_tracks (track_id) VALUES (?)", [(t,) for t in track_ids])
+            else:
+                conn.executemany("DELETE FROM saved_tracks WHERE track_id = ?", [(t,) for t in track_ids])
+    except Exception as e:
+        print(f"Error saving Liked Songs: {e}")
+
+def sync_saved_tracks(full):
+    """Refresh the Liked Songs mirror.
+
+    A full sync pages through the whole library. An incremental sync reads the newest
+    likes until it reaches one we already know, which picks up likes made in other apps.
+    """
+    global saved_track_ids, saved_tracks_ready, saved_tracks_synced_at, saved_tracks_sync_changes
+    if full:
+        with saved_tracks_lock:
+            saved_tracks_sync_changes = {}
+    try:
+        results = get_spotify().current_user_saved_tracks(limit=50)
+        if full:
+            items = fetch_all_items(results)
+            fetched = [item['track']['id'] for item in items if item.get('track') and item['track'].get('id')]
+        else:
+            fetched = []
+            while True:
+                page_ids = [item['track']['id'] for item in results['items'] if item.get('track') and item['track'].get('id')]
+                fetched.extend(page_ids)
+                if any(track_id in saved_track_ids for track_id in page_ids) or not results['next']:
+                    break
+                results = get_spotify().next(results)
         
+        with saved_tracks_lock:
+            if full:
+                # A new set swapped in whole, so is_track_liked never sees it half-filled
+                synced = set(fetched)
+                # Keep likes/unlikes the user made while we were downloading
+                for track_id, liked in saved_tracks_sync_changes.items():
+                    if liked:
+                        synced.add(track_id)
+                    else:
+                        synced.discard(track_id)
+                saved_track_ids = synced
+                saved_tracks_synced_at = time.time()
+            else:
+                saved_track_ids.update(fetched)
+            saved_tracks_ready = True
+            snapshot = list(saved_track_ids)
+    finally:
+        if full:
+            with saved_tracks_lock:
+                saved_tracks_sync_changes = None
+    
+    with cache_db() as conn:
+        if full:
+            conn.execute("DELETE FROM saved_tracks")
+        conn.executemany("INSERT OR IGNORE INTO saved_tracks (track_id) VALUES (?)", [(t,) for t in snapshot])
+        conn.execute(
+            "INSERT OR REPLACE INTO cache_meta (key, value) VALUES ('saved_tracks_synced_at', ?)",
+            (str(saved_tracks_synced_at),)
+        )
+    print(f"Liked Songs {'synced' if full else 'refreshed'}: {len(snapshot)} tracks.")
+
+def liked_songs_sync_loop():
+    while True:
         try:
-            track_uris = set()
-            results = sp.playlist_items(pid, additional_types=['track'], limit=100, fields='next,items(track(uri))')
-            
-            def add_items(items):
-                for item in items:
-                    if item.get('track') and item['track'].get('uri'):
-                        track_uris.add(item['track']['uri'])
-            
-            add_items(results['items'])
-            while results['next']:
-                results = sp.next(results)
-                add_items(results['items'])
-            
-            playlist_tracks_cache[pid] = track_uris
-            count += 1
-            time.sleep(2) # Sleep to respect rate limits
+            if token_manager.token():
+                sync_saved_tracks(full=time.time() - saved_tracks_synced_at > LIKED_SONGS_FULL_SYNC_SECONDS)
+        except Exception as e:
+            print(f"Error syncing Liked Songs: {e}")
+            if is_rate_limited(e):
+                # Try again as soon as the back-off is over rather than a whole interval later
+                time.sleep(request_governor.pause_remaining() + 1)
+                continue
+        time.sleep(LIKED_SONGS_REFRESH_SECONDS)
+
+def start_liked_songs_sync():
+    global saved_tracks_thread
+    with saved_tracks_lock:
+        if saved_tracks_thread is None:
+            saved_tracks_thread = threading.Thread(target=liked_songs_sync_loop, daemon=True, name="liked-songs")
+            saved_tracks_thread.start()
+
+class WriteQueue:
+    """Write-behind queue for playlist and Liked Songs changes.
+
+    Toggles update the local caches and return straight away; a background thread
+    writes the changes to Spotify once clicks have paused for `delay` seconds.
+    An add and a remove of the same track that are both still queued cancel out.
+    Each playlist's changes go out as batched remove and add calls, and likes and
+    unlikes in batches of LIKED_SONGS_WRITE_BATCH_SIZE. Until a change has been
+    written, it is re-applied to any copy of the playlist the cache loader fetches.
+    """
+
+    def __init__(self, delay):
+        self.delay = delay
+        self.cond = threading.Condition()
+        self.playlist_ops = {}   # Playlist ID -> {Track URI: "add" | "remove"} not yet sent
+        self.sending = {}        # Same shape, for the batch being written right now
+        self.liked_ops = {}      # Track ID -> True (like) / False (unlike) not yet sent
+        self.sending_liked = {}  # Same shape, for the likes being written right now
+        self.last_change = 0.0
+        self.writes_sent = 0
+        self.failures = []       # Most recent writes Spotify refused
+        self.thread = None
+        # Held while writing, so a flush at exit waits for one already under way
+        self.flushing = threading.Lock()
+
+    def playlist_change(self, pid, track_uris, action):
+        """Queue adding ("add") or removing ("remove") tracks from a playlist."""
+        with self.cond:
+            ops = self.playlist_ops.setdefault(pid, {})
+            for uri in track_uris:
+                if ops.get(uri, action) != action:
+                    # The opposite change is still queued; together they are a no-op
+                    del ops[uri]
+                else:
+                    ops[uri] = action
+            if not ops:
+                del self.playlist_ops[pid]
+            self._changed()
+
+    def like_change(self, track_ids, liked):
+        """Queue liking or unliking tracks (the last change per track wins)."""
+        with self.cond:
+            for track_id in track_ids:
+                self.liked_ops[track_id] = liked
+            self._changed()
+
+    def _changed(self):
+        self.last_change = time.monotonic()
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._run, daemon=True, name="write-behind")
+            self.thread.start()
+        self.cond.notify_all()
+
+    def apply_pending(self, pid, track_uris):
+        """A playlist's tracks as they will be once its queued changes are written."""
+        with self.cond:
+            changes = list(self.sending.get(pid, {}).items()) + list(self.playlist_ops.get(pid, {}).items())
+        if not changes:
+            return track_uris
+        track_uris = set(track_uris)
+        for uri, action in changes:
+            if action == 'add':
+                track_uris.add(uri)
+            else:
+                track_uris.discard(uri)
+        return track_uris
+
+    def has_pending(self, pid):
+        """True if changes to the playlist are queued or being written."""
+        with self.cond:
+            return pid in self.playlist_ops or pid in self.sending
+
+    def has_pending_like(self, track_id):
+        """True if a like or unlike of the track is queued or being written."""
+        with self.cond:
+            return track_id in self.liked_ops or track_id in self.sending_liked
+
+    def status(self):
+        with self.cond:
+            playlists = {}
+            for ops in (self.sending, self.playlist_ops):
+                for pid, changes in ops.items():
+                    counts = playlists.setdefault(pid, {"add": 0, "remove": 0})
+                    for action in changes.values():
+                        counts[action] += 1
+            return {
+                "playlists": playlists,
+                "like": sum(1 for liked in self.liked_ops.values() if liked),
+                "unlike": sum(1 for liked in self.liked_ops.values() if not liked),
+                "writes_sent": self.writes_sent,
+                "failures": list(self.failures),
+            }
+
+    def _run(self):
+        while True:
+            with self.cond:
+                self.cond.wait_for(lambda: self.playlist_ops or self.liked_ops)
+                # Let a run of clicks settle before writing
+                while (wait := self.last_change + self.delay - time.monotonic()) > 0:
+                    self.cond.wait(wait)
+            self.flush()
+
+    def flush(self):
+        """Write everything queued now (also called at exit, including on SIGTERM)."""
+        with self.flushing:
+            with self.cond:
+                playlist_ops, self.playlist_ops = self.playlist_ops, {}
+                liked_ops, self.liked_ops = self.liked_ops, {}
+                # A copy: playlists leave it once their writes are settled
+                self.sending = dict(playlist_ops)
+                self.sending_liked = liked_ops
+            try:
+                for pid, ops in playlist_ops.items():
+                    self._write_playlist(pid, ops)
+                for liked in (True, False):
+                    self._write_liked([track_id for track_id, l in liked_ops.items() if l == liked], liked)
+            finally:
+                with self.cond:
+                    self.sending = {}
+                    self.sending_liked = {}
+
+    def _failed(self, what, error):
+        print(f"Error writing {what}: {error}")
+        with self.cond:
+            self.failures = (self.failures + [{"what": what, "error": str(error), "at": time.time()}])[-20:]
+
+    def _write_playlist(self, pid, ops):
+        adds = [uri for uri, action in ops.items() if action == 'add']
+        removes = [uri for uri, action in ops.items() if action == 'remove']
+        # Removes go out before adds, each in batches
+        batches = [('remove', removes[i:i + PLAYLIST_WRITE_BATCH_SIZE]) for i in range(0, len(removes), PLAYLIST_WRITE_BATCH_SIZE)]
+        batches += [('add', adds[i:i + PLAYLIST_WRITE_BATCH_SIZE]) for i in range(0, len(adds), PLAYLIST_WRITE_BATCH_SIZE)]
+        for sent, (action, batch) in enumerate(batches):
+            client = get_spotify()
+            write = client.playlist_add_items if action == 'add' else client.playlist_remove_all_occurrences_of_items
+            try:
+                record_write_snapshot(pid, write(pid, batch))
+                self.writes_sent += 1
+            except Exception as e:
+                if is_rate_limited(e):
+                    # Still rate limited after the governor's retries; queue this batch and the ones
+                    # after it again under any newer changes (the batches before it went through)
+                    for action, batch in batches[sent:]:
+                        self.playlist_change(pid, batch, action)
+                    return
+                displayed = playlist_state.displayed
+                self._failed(f"changes to playlist {displayed.get(pid, pid)}", e)
+                # Spotify refused these changes, so they mustn't be re-applied to the copy read next
+                with self.cond:
+                    self.sending.pop(pid, None)
+                # Our cached copy now disagrees with Spotify; have the loader read it again
+                with cache_lock:
+                    cached_snapshots.pop(pid, None)
+                save_playlist_tracks(pid)
+                if pid in displayed:
+                    cache_loader.submit(pid, displayed[pid], PRIORITY_VISIBLE)
+                return
+        # Spotify has these changes now, so the cached set can be saved as current
+        with self.cond:
+            self.sending.pop(pid, None)
+        save_playlist_tracks(pid)
+
+    def _write_liked(self, track_ids, liked):
+        client = get_spotify()
+        write = client.current_user_saved_tracks_add if liked else client.current_user_saved_tracks_delete
+        for i in range(0, len(track_ids), LIKED_SONGS_WRITE_BATCH_SIZE):
+            batch = track_ids[i:i + LIKED_SONGS_WRITE_BATCH_SIZE]
+            try:
+                write(batch)
+                self.writes_sent += 1
+            except Exception as e:
+                if is_rate_limited(e):
+                    with self.cond:
+                        for track_id in batch:
+                            self.liked_ops.setdefault(track_id, liked)
+                        self._changed()
+                    continue
+                self._failed(f"{'likes' if liked else 'unlikes'} for {len(batch)} tracks", e)
+                # Put the mirror back, except for tracks toggled again since
+                with self.cond:
+                    refused = [track_id for track_id in batch if track_id not in self.liked_ops]
+                record_liked(refused, not liked)
+
+write_queue = WriteQueue(WRITE_BEHIND_DELAY_SECONDS)
+atexit.register(write_queue.flush)
+
+def store_playlist_tracks(pid, track_uris, snapshot_id):
+    # Keep toggles that haven't reached Spotify yet
+    set_playlist_tracks(pid, write_queue.apply_pending(pid, track_uris))
+    save_playlist_tracks(pid, snapshot_id)
+
+# Cache loader priorities (lower runs first)
+PRIORITY_LIVE = 0        # a check-playlists request is waiting on this playlist
+PRIORITY_VISIBLE = 1     # playlist is on the page the user has open
+PRIORITY_BACKGROUND = 2  # everything else, in CSV order
+PRIORITY_LIBRARY = 3     # playlists not on any page, for the library index
+
+# Page the user most recently opened: "playlists", "tracker" or "queue"
+visible_page = "playlists"
+
+class CacheLoader:
+    """Single background loader for playlist_tracks_cache, fed through a priority queue.
+
+    Each playlist is queued at most once; re-submitting it with a better priority
+    moves it ahead, and workers drop the stale heap entry it leaves behind.
+    `workers` coroutines on the async client's loop fetch playlists concurrently.
+
+    A playlist is only ever fetched once at a time: workers and live checks share
+    the same in-flight fetch (see fetch_now), so whatever a live check reads ends
+    up in the cache. Pages from a fetch that failed part-way are kept and reused
+    by the next attempt if the playlist's snapshot hasn't changed.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self.heap = []
+        self.queued = {}         # Playlist ID -> (priority, spotify_name)
+        self.in_progress = set()
+        self.fetches = {}        # Playlist ID -> running fetch task (loop thread only)
+        self.fetch_pages = {}    # Playlist ID -> pages read so far by the running fetch
+        self.page_listeners = {} # Playlist ID -> callbacks for each page the running fetch reads
+        self.partial = {}        # Playlist ID -> (snapshot_id, {offset: URIs}) from failed fetches
+        self.seq = itertools.count()
+        self.lock = threading.Lock()
+        self.wakeup = None       # asyncio.Event, created on the loop
+        self.started = False
+        self.cached_count = 0
+
+    def submit(self, pid, sname, priority=PRIORITY_BACKGROUND):
+        with self.lock:
+            if pid in self.in_progress:
+                return
+            queued = self.queued.get(pid)
+            if queued is not None and queued[0] <= priority:
+                return
+            self.queued[pid] = (priority, sname)
+            heapq.heappush(self.heap, (priority, next(self.seq), pid))
+            start = not self.started
+            self.started = True
+        loop = get_async_loop()
+        if start:
+            asyncio.run_coroutine_threadsafe(self._run(), loop)
+        loop.call_soon_threadsafe(self._wake)
+
+    def schedule(self, playlists, priority=PRIORITY_BACKGROUND):
+        """Queue every stale playlist in the list. Returns how many were already up to date."""
+        skipped = 0
+        for pl in playlists:
+            if pl.get('is_divider'): continue
             
+            # Unchanged since it was cached — no need to page through it again
+            if is_playlist_indexed(pl['id']):
+                skipped += 1
+                continue
+            self.submit(pl['id'], pl['spotify_name'], priority)
+        return skipped
+
+    def prioritize_page(self, page):
+        """Move the playlists of the page the user just opened to the front of the queue."""
+        global visible_page
+        visible_page = page
+        self.schedule(playlist_state.page(page), PRIORITY_VISIBLE)
+
+    def pending(self):
+        with self.lock:
+            return len(self.queued) + len(self.in_progress)
+
+    def _event(self):
+        # Only called on the loop thread
+        if self.wakeup is None:
+            self.wakeup = asyncio.Event()
+        return self.wakeup
+
+    def _wake(self):
+        self._event().set()
+
+    def _next_job(self):
+        with self.lock:
+            while self.heap:
+                priority, _, pid = heapq.heappop(self.heap)
+                queued = self.queued.get(pid)
+                # Skip entries superseded by a higher-priority resubmission
+                if queued is not None and queued[0] == priority:
+                    del self.queued[pid]
+                    self.in_progress.add(pid)
+                    return pid, queued[1], priority
+            return None
+
+    async def _run(self):
+        await asyncio.gather(*(self._worker() for _ in range(self.workers)))
+
+    async def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                self._event().clear()
+                await self._event().wait()
+                continue
+            pid, sname, priority = job
+            try:
+                await self._load(pid, sname, priority)
+            finally:
+                with self.lock:
+                    self.in_progress.discard(pid)
+                    idle = not self.queued and not self.in_progress
+                if idle:
+                    print(f"Cache loader idle. Cached {self.cached_count} playlists so far.")
+
+    async def _load(self, pid, sname, priority):
+        if is_playlist_indexed(pid):
+            return
+        try:
+            await self.fetch_now(pid, sname, priority)
         except Exception as e:
             print(f"Error caching playlist {sname}: {e}")
-            
-    print(f"Cache population complete. Cached {count}/{len(dashboard_playlists)} playlists.")
+
+    def fetch_now(self, pid, sname, priority=PRIORITY_LIVE, on_page=None):
+        """Task fetching and caching a playlist's track URIs, joining the one in flight if any.
+
+        Loop thread only. The task takes the playlist out of the queue; if it is
+        rate limited it is re-queued at `priority`. `on_page(uris)` is called for
+        every page the fetch has read or reads from now on.
+        """
+        task = self.fetches.get(pid)
+        if task is None:
+            with self.lock:
+                # Leaves a stale heap entry, which _next_job skips
+                self.queued.pop(pid, None)
+                self.in_progress.add(pid)
+            self.fetch_pages[pid] = {}
+            self.page_listeners[pid] = []
+            task = asyncio.ensure_future(self._fetch(pid))
+            self.fetches[pid] = task
+            task.add_done_callback(lambda task: self._fetched(pid, sname, priority, task))
+        if on_page is not None:
+            for uris in list(self.fetch_pages[pid].values()):
+                on_page(uris)
+            self.page_listeners[pid].append(on_page)
+        return task
+
+    async def _fetch(self, pid):
+        # The listing snapshot this fetch corresponds to (it may move on while we page)
+        snapshot_id = playlist_snapshots.get(pid)
+        partial = self.partial.pop(pid, None)
+        pages = self.fetch_pages[pid]
+        listeners = self.page_listeners[pid]
+
+        def on_page(uris):
+            for listener in listeners:
+                listener(uris)
+
+        if partial and snapshot_id and partial[0] == snapshot_id:
+            pages.update(partial[1])
+            for uris in partial[1].values():
+                on_page(uris)
+
+        try:
+            track_uris = await async_sp.playlist_track_uris(pid, pages, on_page)
+        except Exception:
+            if pages:
+                self.partial[pid] = (snapshot_id, pages)
+            raise
+        await asyncio.to_thread(store_playlist_tracks, pid, track_uris, snapshot_id)
+        self.cached_count += 1
+        return track_uris
+
+    def _fetched(self, pid, sname, priority, task):
+        del self.fetches[pid]
+        del self.fetch_pages[pid]
+        del self.page_listeners[pid]
+        with self.lock:
+            self.in_progress.discard(pid)
+        error = None if task.cancelled() else task.exception()
+        if is_rate_limited(error):
+            # Back in the queue; workers pick it up once the governor's back-off ends
+            self.submit(pid, sname, priority)
+        elif getattr(error, 'http_status', None) in UNREADABLE_STATUSES:
+            unreadable_playlists[pid] = (error.http_status, playlist_snapshots.get(pid))
+            note_index_change(pid)
+        elif error is None:
+            unreadable_playlists.pop(pid, None)
+
+cache_loader = CacheLoader(CACHE_WORKERS)
+
+def schedule_page_cache(page):
+    """Queue a page's playlists after (re)loading them, ahead of the others if it is on screen."""
+    priority = PRIORITY_VISIBLE if page == visible_page else PRIORITY_BACKGROUND
+    skipped = cache_loader.schedule(playlist_state.page(page), priority)
+    print(f"Queued {page} playlists for caching ({skipped} unchanged).")
+
+def schedule_library_index():
+    """Queue every library playlist that isn't on a page, behind all the displayed ones."""
+    if not LIBRARY_INDEX:
+        return
+    displayed = playlist_state.displayed
+    playlists = [{'id': pid, 'spotify_name': sname} for pid, sname in library_playlists.items() if pid not in displayed]
+    skipped = cache_loader.schedule(playlists, PRIORITY_LIBRARY)
+    print(f"Queued {len(playlists)} other library playlists for the library index ({skipped} unchanged).")
 
 def fetch_all_user_playlists():
     """Fetch all user playlists from Spotify once. Returns list of playlist dicts or None on error."""
     print("Fetching user playlists from Spotify...")
-    spotify_playlists = []
+    while True:
+        try:
+            spotify_playlists = run_async(async_sp.current_user_playlists())
+            break
+        except Exception as e:
+            print(f"Error fetching playlists: {e}")
+            if not is_rate_limited(e):
+                return None
+            # Nothing can load without the listing; wait out the back-off and ask again
+            time.sleep(request_governor.pause_remaining() + 1)
+    spotify_playlists = [p for p in spotify_playlists if p]
+    print(f"Fetched {len(spotify_playlists)} user playlists from Spotify.")
+    apply_playlist_listing(spotify_playlists)
+    save_playlist_listing(spotify_playlists)
+    return spotify_playlists
+
+def apply_playlist_listing(spotify_playlists):
+    global library_playlists, latest_listing
+    latest_listing = spotify_playlists
+    for p in spotify_playlists:
+        if p.get('snapshot_id'):
+            playlist_snapshots[p['id']] = p['snapshot_id']
+    with library_index_lock:
+        library_playlists = {p['id']: p['name'] for p in spotify_playlists}
+        unindexed_playlists.clear()
+        unindexed_playlists.update(pid for pid in library_playlists if not is_playlist_indexed(pid))
+    prune_playlist_cache()
+
+def prune_playlist_cache():
+    """Forget cached playlists that have left the library (deleted or unfollowed), in memory and on disk."""
+    keep = set(library_playlists) | set(playlist_state.displayed)
+    with cache_lock:
+        gone = [pid for pid in playlist_tracks_cache.playlist_ids() if pid not in keep and not write_queue.has_pending(pid)]
+        for pid in gone:
+            playlist_tracks_cache.discard(pid)
+            cached_snapshots.pop(pid, None)
+            playlist_snapshots.pop(pid, None)
+            unreadable_playlists.pop(pid, None)
+    if not gone:
+        return
     try:
-        results = sp.current_user_playlists(limit=50)
-        spotify_playlists.extend(results['items'])
-        while results['next']:
-            results = sp.next(results)
-            spotify_playlists.extend(results['items'])
+        with cache_db() as conn:
+            conn.executemany("DELETE FROM playlist_tracks WHERE playlist_id = ?", [(pid,) for pid in gone])
     except Exception as e:
-        print(f"Error fetching playlists: {e}")
+        print(f"Error pruning playlist cache: {e}")
+    print(f"Dropped {len(gone)} cached playlists no longer in the library.")
+
+def listing_entry(p):
+    return (p['id'], p['name'], p.get('snapshot_id'), (p.get('tracks') or {}).get('total'))
+
+def save_playlist_listing(spotify_playlists):
+    """Keep the listing on disk so the next start can build the pages without waiting for Spotify."""
+    try:
+        with cache_db() as conn:
+            conn.execute("DELETE FROM playlist_listing")
+            conn.executemany(
+                "INSERT INTO playlist_listing (position, playlist_id, name, snapshot_id, total) VALUES (?, ?, ?, ?, ?)",
+                [(i, *listing_entry(p)) for i, p in enumerate(spotify_playlists)]
+            )
+    except Exception as e:
+        print(f"Error saving playlist listing: {e}")
+
+def restore_playlist_listing():
+    """The listing saved by the last fetch, shaped like Spotify's, or None if there is none."""
+    try:
+        with cache_db() as conn:
+            rows = conn.execute(
+                "SELECT playlist_id, name, snapshot_id, total FROM playlist_listing ORDER BY position"
+            ).fetchall()
+    except Exception as e:
+        print(f"Error reading playlist listing: {e}")
         return None
-    print(f"Fetched {len(spotify_playlists)} user playlists from Spotify.")
-    return spotify_playlists
+    if not rows:
+        return None
+    return [
+        {'id': pid, 'name': name, 'snapshot_id': snapshot_id, 'tracks': {'total': total}}
+        for pid, name, snapshot_id, total in rows
+    ]
 
 def load_playlists(spotify_playlists=None):
-    global playlist_map, dashboard_playlists
     playlist_map = {}
     dashboard_playlists = []
     
@@ -152,20 +1199,16 @@ def load_playlists(spotify_playlists=None):
             print(f"Warning: Playlist '{s_name}' not found in your Spotify library.")
 
     print(f"Loaded {len(dashboard_playlists)} matched playlists.")
+    publish_playlist_state(dashboard=dashboard_playlists, playlist_map=playlist_map)
 
-    # Start background cache population
-    threading.Thread(target=populate_playlist_cache, daemon=True).start()
+    # Queue background cache population
+    schedule_page_cache("playlists")
 
-# Global list for Tracker Page
-tracker_playlists = []
 TRACKER_CSV_FILE = "data/csv/Tracker to Display.csv"
 
-# Global list for Queue Page
-queue_playlists = []
 QUEUE_CSV_FILE = "data/csv/Queue to Display.csv"
 
 def load_tracker_playlists(spotify_playlists=None):
-    global tracker_playlists
     tracker_playlists = []
     
     csv_mapping = []
@@ -219,8 +1262,7 @@ def load_tracker_playlists(spotify_playlists=None):
                 pid = duplicate_overrides[s_name]
             
             # Add to main cache map if not there (helps with toggling)
-            if pid not in playlist_tracks_cache:
-                playlist_tracks_cache[pid] = set()
+            ensure_playlist_cache_entry(pid)
             
             tracker_playlists.append({
                 "name": d_name,
@@ -232,38 +1274,12 @@ def load_tracker_playlists(spotify_playlists=None):
             print(f"Warning: Tracker Playlist '{s_name}' not found.")
 
     print(f"Loaded {len(tracker_playlists)} tracker items.")
+    publish_playlist_state(tracker=tracker_playlists)
     
-    # Trigger cache population for these new IDs
-    threading.Thread(target=populate_tracker_cache, daemon=True).start()
-
-def populate_tracker_cache():
-    global playlist_tracks_cache
-    print("Starting background cache (Tracker)...")
-    count = 0
-    for pl in tracker_playlists:
-        if pl.get('is_divider'): continue
-        
-        pid = pl['id']
-        sname = pl['spotify_name']
-        try:
-            track_uris = set()
-            results = sp.playlist_items(pid, additional_types=['track'], limit=100, fields='next,items(track(uri))')
-            def add_items(items):
-                for item in items:
-                    if item.get('track') and item['track'].get('uri'):
-                        track_uris.add(item['track']['uri'])
-            add_items(results['items'])
-            while results['next']:
-                results = sp.next(results)
-                add_items(results['items'])
-            playlist_tracks_cache[pid] = track_uris
-            count += 1
-        except Exception as e:
-            print(f"Error caching tracker playlist {sname}: {e}")
-    print(f"Tracker Cache complete. Cached {count} playlists.")
+    # Queue cache population for these new IDs
+    schedule_page_cache("tracker")
 
 def load_queue_playlists(spotify_playlists=None):
-    global queue_playlists
     queue_playlists = []
     
     csv_mapping = []
@@ -303,8 +1319,7 @@ def load_queue_playlists(spotify_playlists=None):
         if s_name in sp_name_to_id:
             pid = sp_name_to_id[s_name]
             # Add to main cache map if not there (helps with toggling)
-            if pid not in playlist_tracks_cache:
-                playlist_tracks_cache[pid] = set()
+            ensure_playlist_cache_entry(pid)
             
             queue_playlists.append({
                 "name": d_name,
@@ -316,52 +1331,89 @@ def load_queue_playlists(spotify_playlists=None):
             print(f"Warning: Queue Playlist '{s_name}' not found.")
 
     print(f"Loaded {len(queue_playlists)} queue items.")
+    publish_playlist_state(queue=queue_playlists)
     
-    # Trigger cache population for these new IDs
-    threading.Thread(target=populate_queue_cache, daemon=True).start()
-
-def populate_queue_cache():
-    global playlist_tracks_cache
-    print("Starting background cache (Queue)...")
-    count = 0
-    for pl in queue_playlists:
-        if pl.get('is_divider'): continue
-        
-        pid = pl['id']
-        sname = pl['spotify_name']
-        try:
-            track_uris = set()
-            results = sp.playlist_items(pid, additional_types=['track'], limit=100, fields='next,items(track(uri))')
-            def add_items(items):
-                for item in items:
-                    if item.get('track') and item['track'].get('uri'):
-                        track_uris.add(item['track']['uri'])
-            add_items(results['items'])
-            while results['next']:
-                results = sp.next(results)
-                add_items(results['items'])
-            playlist_tracks_cache[pid] = track_uris
-            count += 1
-        except Exception as e:
-            print(f"Error caching queue playlist {sname}: {e}")
-    print(f"Queue Cache complete. Cached {count} playlists.")
+    # Queue cache population for these new IDs
+    schedule_page_cache("queue")
+
+def load_all_pages(spotify_playlists):
+    load_playlists(spotify_playlists)
+    load_tracker_playlists(spotify_playlists)
+    load_queue_playlists(spotify_playlists)
+    schedule_library_index()
+
+def revalidate_pages(saved_playlists, spotify_playlists):
+    """Bring pages built from the saved listing up to date with the fresh one, touching only what changed."""
+    if [(p['id'], p['name']) for p in saved_playlists] != [(p['id'], p['name']) for p in spotify_playlists]:
+        print("Playlist listing changed since last run; rebuilding pages.")
+        load_all_pages(spotify_playlists)
+    elif [listing_entry(p) for p in saved_playlists] != [listing_entry(p) for p in spotify_playlists]:
+        # Same playlists, but some have new snapshots; queue just those for re-caching
+        for page in ("playlists", "tracker", "queue"):
+            schedule_page_cache(page)
+        schedule_library_index()
+    else:
+        print("Playlist listing unchanged since last run.")
+
+def csv_mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def watch_display_csvs():
+    """Reload a page when its CSV is edited.
+
+    Only the changed CSV is re-read, and its names are resolved against the
+    listing already in memory, so Spotify isn't asked for the library again.
+    The page's cache scheduling then queues only playlists that aren't cached
+    yet; everything else stays as it is.
+    """
+    loaders = {
+        CSV_FILE: load_playlists,
+        TRACKER_CSV_FILE: load_tracker_playlists,
+        QUEUE_CSV_FILE: load_queue_playlists,
+    }
+    mtimes = {path: csv_mtime(path) for path in loaders}
+    while True:
+        time.sleep(CSV_WATCH_SECONDS)
+        for path, loader in loaders.items():
+            mtime = csv_mtime(path)
+            if mtime == mtimes[path]:
+                continue
+            mtimes[path] = mtime
+            # Before the first listing there is nothing to resolve against; the initial load reads the CSV
+            if mtime is None or latest_listing is None:
+                continue
+            print(f"{path} changed; reloading that page.")
+            try:
+                loader(latest_listing)
+            except Exception as e:
+                print(f"Error reloading {path}: {e}")
 
 # Helper to load playlists only if authorized
 def safe_load_playlists():
     global loading_state
     try:
-        auth_manager = get_auth_manager()
-        token = auth_manager.get_cached_token()
+        token = token_manager.token()
         if token:
             print(f"Token found. Loading playlists... (expires: {token.get('expires_at', 'unknown')})")
+            start_liked_songs_sync()
+            # Build the pages straight away from the listing saved last time, then revalidate
+            saved_playlists = restore_playlist_listing()
+            if saved_playlists is not None:
+                apply_playlist_listing(saved_playlists)
+                load_all_pages(saved_playlists)
+                loading_state = "done"
+                print(f"Built pages from the saved listing of {len(saved_playlists)} playlists.")
             # Fetch all user playlists ONCE and share across all loaders
             spotify_playlists = fetch_all_user_playlists()
-            if spotify_playlists is not None:
-                load_playlists(spotify_playlists)
-                load_tracker_playlists(spotify_playlists)
-                load_queue_playlists(spotify_playlists)
-            else:
+            if spotify_playlists is None:
                 print("Failed to fetch user playlists from Spotify.")
+            elif saved_playlists is None:
+                load_all_pages(spotify_playlists)
+            else:
+                revalidate_pages(saved_playlists, spotify_playlists)
         else:
             print("No valid token found. Skipping initial playlist load.")
     except Exception as e:
@@ -372,51 +1424,92 @@ def safe_load_playlists():
         loading_state = "done"
         print(f"Loading state set to: {loading_state}")
 
-# Initial Load Attempt — run in background so Flask starts serving immediately
-threading.Thread(target=safe_load_playlists, daemon=True).start()
+# Startup phase -> milliseconds since STARTUP_BEGAN, in the order they were reached
+startup_timings = {}
+
+def mark_startup_phase(phase):
+    if phase not in startup_timings:
+        startup_timings[phase] = round((time.perf_counter() - STARTUP_BEGAN) * 1000, 1)
+        print(f"Startup: {phase} after {startup_timings[phase]:.0f}ms")
+
+def warm_up():
+    """Everything startup needs beyond serving /health, in the background.
+
+    Imports and builds the Spotify client, restores the on-disk caches, starts the
+    CSV watcher, then runs the initial playlist load. Pages keep showing "Loading playlists…" until
+    loading_state is done, so nothing waits on this but the playlists themselves.
+    """
+    get_spotify()
+    token_manager.start()
+    mark_startup_phase("spotify_client_ready")
+    restore_playlist_cache()
+    restore_saved_tracks()
+    mark_startup_phase("caches_restored")
+    # Started first: the initial load can spend a long while retrying the listing after a 429,
+    # and pages built from the saved listing should follow CSV edits in the meantime
+    threading.Thread(target=watch_display_csvs, daemon=True, name="csv-watcher").start()
+    safe_load_playlists()
+    mark_startup_phase("playlists_loaded")
+
+mark_startup_phase("app_imported")
+
+# With the auto-reloader, the first process only watches files and restarts the real
+# server (WERKZEUG_RUN_MAIN is set in that one); it must not load anything itself
+if not (__name__ == '__main__' and FLASK_USE_RELOADER and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'):
+    threading.Thread(target=warm_up, daemon=True, name="warm-up").start()
 
 # Health check endpoint (fast, no auth required)
 @app.route('/health')
 def health():
+    mark_startup_phase("first_health")
     return 'ok', 200
 
+@app.route('/api/startup-timings')
+def get_startup_timings():
+    """Milliseconds from process start to each startup phase."""
+    return jsonify(startup_timings)
+
 @app.route('/')
 def index():
-    auth_manager = get_auth_manager()
-    if not auth_manager.validate_token(auth_manager.get_cached_token()):
+    if not token_manager.token():
         return redirect('/login')
+    cache_loader.prioritize_page("playlists")
     response = send_from_directory('static', 'playlists.html')
     response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
     return response
 
 @app.route('/tracker')
 def tracker():
-    auth_manager = get_auth_manager()
-    if not auth_manager.validate_token(auth_manager.get_cached_token()):
+    if not token_manager.token():
         return redirect('/login')
+    cache_loader.prioritize_page("tracker")
     response = send_from_directory('static', 'tracker.html')
     response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
     return response
 
 @app.route('/api/tracker-playlists')
 def get_tracker_playlists():
-    response = jsonify(tracker_playlists)
+    state = playlist_state
+    response = jsonify(state.tracker)
     response.headers['X-Loading-State'] = loading_state
+    response.headers['X-State-Version'] = str(state.version)
     return response
 
 @app.route('/queue')
 def queue():
-    auth_manager = get_auth_manager()
-    if not auth_manager.validate_token(auth_manager.get_cached_token()):
+    if not token_manager.token():
         return redirect('/login')
+    cache_loader.prioritize_page("queue")
     response = send_from_directory('static', 'queue.html')
     response.headers['Cache-Control'] = 'no-cache, no-store, must-revalidate'
     return response
 
 @app.route('/api/queue-playlists')
 def get_queue_playlists():
-    response = jsonify(queue_playlists)
+    state = playlist_state
+    response = jsonify(state.queue)
     response.headers['X-Loading-State'] = loading_state
+    response.headers['X-State-Version'] = str(state.version)
     return response
 
 @app.route('/login')
@@ -427,16 +1520,14 @@ def login():
 
 @app.route('/callback')
 def callback():
-    auth_manager = get_auth_manager()
     code = request.args.get('code')
     if code:
-        auth_manager.get_access_token(code)
+        token_manager.authorize(code)
+        start_liked_songs_sync()
         # Load playlists after successful authentication
         spotify_playlists = fetch_all_user_playlists()
         if spotify_playlists is not None:
-            load_playlists(spotify_playlists)
-            load_tracker_playlists(spotify_playlists)
-            load_queue_playlists(spotify_playlists)
+            load_all_pages(spotify_playlists)
     return redirect('/')
 
 @app.route('/<path:path>')
@@ -448,132 +1539,464 @@ def serve_static(path):
     response.headers['Expires'] = '0'
     return response
 
+# The last now-playing track whose liked state was checked with Spotify
+liked_checked_track_id = None
+
+def check_track_liked(track_id):
+    """Like is_track_liked, but asks Spotify once each time the playing track changes.
+
+    The mirror's incremental refresh only picks up new likes, so an unlike made in
+    another app would otherwise show until the next full sync. A difference found
+    here is written to the mirror unless a like/unlike of the track is on its way.
+    """
+    global liked_checked_track_id
+    if not saved_tracks_ready or track_id == liked_checked_track_id:
+        return is_track_liked(track_id)
+    liked = get_spotify().current_user_saved_tracks_contains([track_id])[0]
+    liked_checked_track_id = track_id
+    if liked != is_track_liked(track_id) and not write_queue.has_pending_like(track_id):
+        record_liked([track_id], liked)
+    return is_track_liked(track_id)
+
+def fetch_now_playing():
+    """Ask Spotify for the current (or most recently played) track.
+
+    Returns (payload sent to clients, epoch seconds the playing track ends or None).
+    """
+    current = get_spotify().current_user_playing_track()
+    ends_at = None
+    if current and current['item']:
+        track = current['item']
+        is_playing = current['is_playing']
+        progress_ms = current.get('progress_ms')
+        duration_ms = track.get('duration_ms')
+        if is_playing and progress_ms is not None and duration_ms:
+            ends_at = time.time() + max(duration_ms - progress_ms, 0) / 1000
+    else:
+        # Fallback to recently played
+        recent = get_spotify().current_user_recently_played(limit=1)
+        if recent and recent['items']:
+            track = recent['items'][0]['track']
+            is_playing = False
+        else:
+            return None, None
+    
+    # Check if liked (with Spotify when the track changes, else from the Liked Songs mirror)
+    is_liked = check_track_liked(track['id'])
+    
+    # Get album info
+    album_name = track['album']['name'] if track.get('album') else 'Unknown Album'
+    album_cover = track['album']['images'][0]['url'] if track.get('album') and track['album'].get('images') else None
+    album_id = track['album']['id'] if track.get('album') else None
+    
+    # Background color from the smallest cover variant (cached per URL)
+    color = None
+    images = track['album'].get('images') if track.get('album') else None
+    if images:
+        smallest = min(images, key=lambda image: image.get('width') or float('inf'))
+        try:
+            r, g, b = get_album_color(smallest['url'])
+            color = {"r": r, "g": g, "b": b}
+        except Exception as e:
+            print(f"Error extracting color: {e}")
+    
+    return ({
+        "id": track['id'],
+        "name": track['name'],
+        "artist": ", ".join([artist['name'] for artist in track['artists']]),
+        "album": album_name,
+        "album_id": album_id,
+        "album_cover": album_cover,
+        "color": color,
+        "is_liked": is_liked,
+        "is_playing": is_playing,
+        "uri": track['uri']
+    }, ends_at)
+
+class NowPlayingPoller:
+    """Single background poller that owns the now-playing state and pushes changes to every client.
+
+    Spotify is polled only while a page is open (recent /api/current-track hit or an
+    open stream), so load does not grow with the number of windows. While a track plays,
+    the next poll is scheduled just after its predicted end, with a slower heartbeat
+    in between to catch skips; paused or idle playback is polled every `interval`.
+    """
+
+    def __init__(self, interval, heartbeat):
+        self.interval = interval
+        self.heartbeat = heartbeat
+        self.next_change_at = None  # predicted end of the playing track (epoch seconds)
+        self.cond = threading.Condition()
+        self.version = 0            # bumped whenever the published state changes
+        self.track = None
+        self.retry_after = None     # seconds, while Spotify is rate limiting us
+        self.error = None
+        self.subscribers = 0
+        self.last_client_seen = 0
+        self.thread = None
+
+    def state(self):
+        with self.cond:
+            return self._state()
+
+    def _state(self):
+        return {
+            "version": self.version,
+            "track": self.track,
+            "retry_after": self.retry_after,
+            "error": self.error,
+            "next_change_at": self.next_change_at,
+        }
+
+    def touch(self):
+        """Note that a client wants now-playing updates; starts the poller on first use."""
+        with self.cond:
+            self.last_client_seen = time.time()
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True, name="now-playing")
+                self.thread.start()
+            self.cond.notify_all()
+
+    def wait_for_first_poll(self, timeout):
+        with self.cond:
+            self.cond.wait_for(lambda: self.version > 0, timeout=timeout)
+            return self._state()
+
+    def wait_for_change(self, version, timeout):
+        """Block until the state moves past `version` (or timeout). Returns the current state."""
+        with self.cond:
+            self.cond.wait_for(lambda: self.version != version, timeout=timeout)
+            return self._state()
+
+    def _publish(self, track, retry_after=None, error=None, next_change_at=None):
+        with self.cond:
+            # The predicted end shifts by a few ms every poll; it alone is not a change worth pushing
+            self.next_change_at = next_change_at
+            if (track, retry_after, error) != (self.track, self.retry_after, self.error) or self.version == 0:
+                self.track = track
+                self.retry_after = retry_after
+                self.error = error
+                self.version += 1
+                self.cond.notify_all()
+
+    def _next_delay(self, ends_at):
+        if ends_at is None:
+            return self.interval
+        remaining = ends_at - time.time()
+        if remaining <= 0:
+            # Spotify hasn't switched tracks yet; check again shortly
+            return 2
+        return min(self.heartbeat, remaining + NOW_PLAYING_END_MARGIN_SECONDS)
+
+    def _has_clients(self):
+        return self.subscribers > 0 or time.time() - self.last_client_seen < NOW_PLAYING_IDLE_SECONDS
+
+    def _run(self):
+        while True:
+            with self.cond:
+                # Sleep until a page is open again
+                self.cond.wait_for(self._has_clients)
+            delay = self.interval
+            paused = request_governor.pause_remaining()
+            if paused > 0:
+                # Another request hit the rate limit; report it instead of queueing behind the pause
+                self._publish(self.track, retry_after=int(paused) + 1)
+                time.sleep(paused)
+                continue
+            try:
+                if token_manager.token():
+                    track, ends_at = fetch_now_playing()
+                    self._publish(track, next_change_at=ends_at)
+                    delay = self._next_delay(ends_at)
+                else:
+                    self._publish(self.track, error="Not authenticated")
+            except Exception as e:
+                if is_rate_limited(e):
+                    print(f"Rate limit hit: {e}")
+                    delay = max(request_governor.pause_remaining(), 1)
+                    self._publish(self.track, retry_after=int(delay))
+                else:
+                    print(f"Error getting current track: {e}")
+                    self._publish(self.track, error=str(e))
+            time.sleep(delay)
+
+now_playing = NowPlayingPoller(NOW_PLAYING_POLL_SECONDS, NOW_PLAYING_HEARTBEAT_SECONDS)
+
+@app.route('/api/rate-limit')
+def get_rate_limit_state():
+    """Current Spotify back-off, and how much cache work is waiting on it."""
+    state = request_governor.state()
+    state["cache_jobs_pending"] = cache_loader.pending()
+    return jsonify(state)
+
 @app.route('/api/current-track')
 def get_current_track():
-    auth_manager = get_auth_manager()
-    if not auth_manager.validate_token(auth_manager.get_cached_token()):
+    if not token_manager.token():
         return jsonify({"error": "Not authenticated"}), 401
 
-    try:
-        current = sp.current_user_playing_track()
-        if current and current['item']:
-            track = current['item']
-            is_playing = current['is_playing']
-        else:
-            # Fallback to recently played
-            recent = sp.current_user_recently_played(limit=1)
-            if recent and recent['items']:
-                track = recent['items'][0]['track']
-                is_playing = False
-            else:
-                return jsonify(None)
-        
-        # Check if liked
-        # current_user_saved_tracks_contains returns list of bools
-        is_liked = sp.current_user_saved_tracks_contains([track['id']])[0]
-        
-        # Get album info
-        album_name = track['album']['name'] if track.get('album') else 'Unknown Album'
-        album_cover = track['album']['images'][0]['url'] if track.get('album') and track['album'].get('images') else None
-        album_id = track['album']['id'] if track.get('album') else None
-        
-        return jsonify({
-            "id": track['id'],
-            "name": track['name'],
-            "artist": ", ".join([artist['name'] for artist in track['artists']]),
-            "album": album_name,
-            "album_id": album_id,
-            "album_cover": album_cover,
-            "is_liked": is_liked,
-            "is_playing": is_playing,
-            "uri": track['uri']
-        })
+    now_playing.touch()
+    state = now_playing.wait_for_first_poll(timeout=10)
+    if state['retry_after']:
+        return jsonify({"error": "Rate limit", "retry_after": state['retry_after']}), 429
+    if state['error'] and state['track'] is None:
+        return jsonify({"error": state['error']}), 500
+    response = jsonify(state['track'])
+    if state['next_change_at']:
+        # Predicted end of the playing track (epoch ms) so polling clients can time their next request
+        response.headers['X-Next-Change-At'] = str(int(state['next_change_at'] * 1000))
+    return response
 
-    except spotipy.exceptions.SpotifyException as e:
-        if e.http_status == 429:
-            print(f"Rate limit hit: {e}")
-            retry_after = int(e.headers.get('Retry-After', 5))
-            return jsonify({"error": "Rate limit", "retry_after": retry_after}), 429
-        print(f"Spotify error getting current track: {e}")
-        return jsonify({"error": str(e)}), 500
-    except Exception as e:
-        print(f"Error getting current track: {e}")
-        return jsonify({"error": str(e)}), 500
+@app.route('/api/current-track/stream')
+def stream_current_track():
+    """Server-Sent Events: pushes the now-playing state whenever the poller sees a change."""
+    if not token_manager.token():
+        return jsonify({"error": "Not authenticated"}), 401
+
+    def events():
+        with now_playing.cond:
+            now_playing.subscribers += 1
+        try:
+            now_playing.touch()
+            version = 0
+            while True:
+                state = now_playing.wait_for_change(version, timeout=15)
+                if state['version'] == version:
+                    # Keep-alive comment; also lets us notice disconnected clients
+                    yield ": keep-alive\n\n"
+                    continue
+                version = state['version']
+                yield f"data: {json.dumps(state)}\n\n"
+        finally:
+            with now_playing.cond:
+                now_playing.subscribers -= 1
+
+    response = Response(events(), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 
 @app.route('/api/playlists')
 def get_playlists():
     # Return playlists with "isActive" status for the given track_id
     track_id = request.args.get('track_id')
+    state = playlist_state
     if not track_id:
-        response = jsonify(dashboard_playlists) # Return without active status
+        response = jsonify(state.dashboard) # Return without active status
         response.headers['X-Loading-State'] = loading_state
+        response.headers['X-State-Version'] = str(state.version)
         return response
 
     # Start with all false
     # ... (logic removed in previous thought, skipping implementation complexity here)
     
-    response = jsonify(dashboard_playlists)
+    response = jsonify(state.dashboard)
     response.headers['X-Loading-State'] = loading_state
+    response.headers['X-State-Version'] = str(state.version)
     return response
 
+async def live_check_playlist(pid, sname, track_uri):
+    """Whether a playlist contains the track, read straight from Spotify.
+
+    This is the cache loader's fetch of the playlist (joining it if it's already
+    running), so the result is cached; if the check runs out of time, the fetch
+    still finishes and fills the cache. Answers as soon as a page has the track.
+    """
+    found = asyncio.get_running_loop().create_future()
+
+    def on_page(uris):
+        if track_uri in uris and not found.done():
+            found.set_result(True)
+
+    fetch = cache_loader.fetch_now(pid, sname, on_page=on_page)
+    await asyncio.wait([fetch, found], return_when=asyncio.FIRST_COMPLETED)
+    return found.done() or track_uri in fetch.result()
+
+async def live_check_playlists(playlists, track_uri, budget):
+    """Check (pid, spotify_name) pairs concurrently for at most `budget` seconds.
+
+    Returns (IDs containing the track, IDs still unknown). Checks that run out of
+    time stop waiting (their fetches carry on); rate-limited ones count as unknown too.
+    """
+    tasks = {asyncio.create_task(live_check_playlist(pid, sname, track_uri)): (pid, sname) for pid, sname in playlists}
+    done, unfinished = await asyncio.wait(tasks, timeout=budget)
+    for task in unfinished:
+        task.cancel()
+    found = []
+    pending = [tasks[task][0] for task in unfinished]
+    for task in done:
+        pid, sname = tasks[task]
+        try:
+            if task.result():
+                found.append(pid)
+        except Exception as e:
+            print(f"Error checking playlist {sname} live: {e}")
+            if is_rate_limited(e):
+                pending.append(pid)
+    return found, pending
+
 @app.route('/api/check-playlists')
 def check_playlists():
     track_uri = request.args.get('track_uri') # Using URI or ID
     if not track_uri:
         return jsonify([])
 
-    auth_manager = get_auth_manager()
-    if not auth_manager.validate_token(auth_manager.get_cached_token()):
+    if not token_manager.token():
         return jsonify({"error": "Not authenticated"}), 401
 
     # Standardize to URI
     if not track_uri.startswith('spotify:track:'):
         track_uri = f'spotify:track:{track_uri}'
 
-    active_ids = []
-    playlists_to_check_live = []
+    # Answer against one state throughout, even if a loader publishes a new one meanwhile
+    state = playlist_state
 
-    # Combine dashboard, tracker, and queue playlists for checking
-    all_playlists = dashboard_playlists + [p for p in tracker_playlists if not p.get('is_divider')] + [p for p in queue_playlists if not p.get('is_divider')]
+    # First check cache: one index lookup covers every cached playlist
+    active_ids = list(playlists_containing(track_uri, state))
 
-    # First check cache
-    for pl in all_playlists:
-        pid = pl['id']
-        # If cache exists for this playlist, use it
-        if pid in playlist_tracks_cache:
-            if track_uri in playlist_tracks_cache[pid]:
-                active_ids.append(pid)
-        else:
-            # Cache not ready for this playlist, need to check live
-            playlists_to_check_live.append((pid, pl['spotify_name']))
+    # Cache not ready for these playlists, need to check live
+    playlists_to_check_live = [(pid, sname) for pid, sname in state.displayed.items() if pid not in playlist_tracks_cache]
 
     # For playlists not in cache, do a live check
+    response_headers = {'X-State-Version': str(state.version)}
     if playlists_to_check_live:
         print(f"Cache incomplete, checking {len(playlists_to_check_live)} playlists live...")
-        for pid, sname in playlists_to_check_live:
-            try:
-                # Check if track is in this playlist
-                results = sp.playlist_items(pid, additional_types=['track'], limit=100, fields='items(track(uri))')
-
-                # Check first page
-                for item in results['items']:
-                    if item.get('track') and item['track'].get('uri') == track_uri:
-                        active_ids.append(pid)
-                        break
-                else:
-                    # Check remaining pages if not found
-                    while results.get('next') and pid not in active_ids:
-                        results = sp.next(results)
-                        for item in results['items']:
-                            if item.get('track') and item['track'].get('uri') == track_uri:
-                                active_ids.append(pid)
-                                break
-            except Exception as e:
-                print(f"Error checking playlist {sname} live: {e}")
+        found, pending = run_async(
+            live_check_playlists(playlists_to_check_live, track_uri, LIVE_CHECK_BUDGET_SECONDS),
+            timeout=LIVE_CHECK_BUDGET_SECONDS + HTTP_TIMEOUT_SECONDS
+        )
+        active_ids.extend(found)
+        if pending:
+            # Their fetches are still running and will be cached; the client asks again shortly
+            response_headers['X-Pending-Playlists'] = ",".join(pending)
+
+    response = jsonify(active_ids)
+    response.headers.update(response_headers)
+    return response
+
+class TableCache:
+    """An in-memory LRU in front of one SQLite table, for values that never go stale.
+
+    Lookups try memory, then the table; puts go to both. Subclasses name the table's
+    queries (`select_sql` takes the key, `insert_sql` the key then `to_row(value)`)
+    and convert between a value and its columns.
+    """
+
+    kind = "cache"
+    select_sql = None
+    insert_sql = None
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def to_row(self, value):
+        return (value,)
+
+    def from_row(self, row):
+        return row[0]
+
+    def get(self, key):
+        with self.lock:
+            value = self.entries.get(key)
+            if value is not None:
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+                return value
+        try:
+            with cache_db() as conn:
+                row = conn.execute(self.select_sql, (key,)).fetchone()
+        except Exception as e:
+            print(f"Error reading {self.kind}: {e}")
+            row = None
+        with self.lock:
+            if row is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            value = self.from_row(row)
+            self._remember(key, value)
+            return value
+
+    def put(self, key, value):
+        with self.lock:
+            self._remember(key, value)
+        try:
+            with cache_db() as conn:
+                conn.execute(self.insert_sql, (key, *self.to_row(value)))
+        except Exception as e:
+            print(f"Error saving {self.kind}: {e}")
+
+    def _remember(self, key, value):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.capacity:
+            self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": (self.memory_hits + self.disk_hits) / lookups if lookups else None,
+                "memory_entries": len(self.entries),
+                "memory_capacity": self.capacity,
+            }
+
+class ColorCache(TableCache):
+    """Album cover URL -> (r, g, b), kept in the album_colors table.
+
+    Cover URLs are immutable per image, so entries never need invalidating.
+    """
 
-    return jsonify(active_ids)
+    kind = "color cache"
+    select_sql = "SELECT r, g, b FROM album_colors WHERE url = ?"
+    insert_sql = "INSERT OR REPLACE INTO album_colors (url, r, g, b) VALUES (?, ?, ?, ?)"
 
+    def to_row(self, color):
+        return color
+
+    def from_row(self, row):
+        return tuple(row)
+
+color_cache = ColorCache(COLOR_CACHE_SIZE)
+
+def extract_color(url):
+    """Download an image and average it down to one (r, g, b) color."""
+    # Add User-Agent to avoid blocking
+    headers = {
+        'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
+    }
+    response = get_http_session().get(url, headers=headers, timeout=HTTP_TIMEOUT_SECONDS)
+    
+    if response.status_code != 200:
+        raise ValueError(f"Failed to fetch image: {response.status_code}")
+
+    # Imported on the first color request rather than at startup
+    from PIL import Image
+    img = Image.open(BytesIO(response.content))
+    # Let the JPEG decoder downscale while decoding (up to 1/8) instead of decoding full size
+    img.draft('RGB', (1, 1))
+    # Resize to 1x1 to get average color
+    img = img.resize((1, 1)).convert('RGB')
+    color = img.getpixel((0, 0))
+    # Log success
+    print(f"Extracted color for {url}: {color}")
+    return tuple(color)
+
+def get_album_color(url):
+    """Cached extract_color: memory, then disk, then download and decode."""
+    color = color_cache.get(url)
+    if color is None:
+        color = extract_color(url)
+        color_cache.put(url, color)
+    return color
 
 @app.route('/api/extract-color')
 def get_extracted_color():
@@ -582,26 +2005,16 @@ def get_extracted_color():
         return jsonify({'r': 0, 'g': 0, 'b': 0, 'error': 'No URL provided'})
 
     try:
-        # Add User-Agent to avoid blocking
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.114 Safari/537.36'
-        }
-        response = requests.get(url, headers=headers)
-        
-        if response.status_code != 200:
-             return jsonify({'r': 0, 'g': 0, 'b': 0, 'error': f"Failed to fetch image: {response.status_code}"})
-
-        img = Image.open(BytesIO(response.content))
-        # Resize to 1x1 to get average color
-        img = img.resize((1, 1)).convert('RGB')
-        color = img.getpixel((0, 0))
-        # Log success
-        print(f"Extracted color for {url}: {color}")
+        color = get_album_color(url)
         return jsonify({'r': color[0], 'g': color[1], 'b': color[2]})
     except Exception as e:
         print(f"Error extracting color: {e}")
         return jsonify({'r': 0, 'g': 0, 'b': 0, 'error': str(e)})
 
+@app.route('/api/extract-color/stats')
+def get_color_cache_stats():
+    return jsonify(color_cache.stats())
+
 
 @app.route('/api/playlist/toggle', methods=['POST'])
 def toggle_playlist():
@@ -613,60 +2026,113 @@ def toggle_playlist():
     if not all([playlist_id, track_uri, action]):
         return jsonify({"error": "Missing data"}), 400
 
-    try:
-        if action == 'add':
-            # 1. Add to Playlist
-            sp.playlist_add_items(playlist_id, [track_uri])
-            
-            # Update Cache
-            if playlist_id in playlist_tracks_cache:
-                playlist_tracks_cache[playlist_id].add(track_uri)
-                
-            # 2. Like the Song (Save to Library)
-            track_id = track_uri.replace('spotify:track:', '')
-            sp.current_user_saved_tracks_add([track_id])
-            message = "Added to playlist and Liked Songs."
-        
-        elif action == 'remove':
-            # 1. Remove from Playlist
-            sp.playlist_remove_all_occurrences_of_items(playlist_id, [track_uri])
-            
-            # Update Cache
-            if playlist_id in playlist_tracks_cache:
-                if track_uri in playlist_tracks_cache[playlist_id]:
-                    playlist_tracks_cache[playlist_id].remove(track_uri)
-            
-            # 2. Check if track exists in ANY other playlists on this page
-            # Combine all playlists (dashboard, tracker, queue)
-            all_playlists = dashboard_playlists + [p for p in tracker_playlists if not p.get('is_divider')] + [p for p in queue_playlists if not p.get('is_divider')]
-            
-            track_exists_elsewhere = False
-            for pl in all_playlists:
-                pid = pl['id']
-                # Skip the playlist we just removed from
-                if pid == playlist_id:
-                    continue
-                # Check if track exists in this playlist's cache
-                if pid in playlist_tracks_cache and track_uri in playlist_tracks_cache[pid]:
-                    track_exists_elsewhere = True
-                    break
-            
-            # If track doesn't exist in any other playlists, unlike it
-            if not track_exists_elsewhere:
-                track_id = track_uri.replace('spotify:track:', '')
-                sp.current_user_saved_tracks_delete([track_id])
-                message = "Removed from playlist and unliked (not in any other playlists)."
-            else:
-                message = "Removed from playlist."
-            
-        else:
-            return jsonify({"error": "Invalid action"}), 400
-
-        return jsonify({"success": True, "message": message})
+    if not token_manager.token():
+        return jsonify({"error": "Not authenticated"}), 401
 
-    except Exception as e:
-        print(f"Error toggling playlist: {e}")
-        return jsonify({"error": str(e)}), 500
+    # Update the caches now; write_queue sends the changes to Spotify shortly (and saves
+    # the playlist's cache to disk once they're written)
+    track_id = track_uri.replace('spotify:track:', '')
+    if action == 'add':
+        # 1. Add to Playlist
+        add_tracks_to_cache(playlist_id, [track_uri])
+        write_queue.playlist_change(playlist_id, [track_uri], 'add')
+
+        # 2. Like the Song (Save to Library)
+        record_liked([track_id], True)
+        write_queue.like_change([track_id], True)
+        message = "Added to playlist and Liked Songs."
+
+    elif action == 'remove':
+        # 1. Remove from Playlist
+        remove_tracks_from_cache(playlist_id, [track_uri])
+        write_queue.playlist_change(playlist_id, [track_uri], 'remove')
+
+        # 2. Check if track exists in ANY other playlists on any page, or anywhere in the
+        # library once the library index is complete
+        # (the playlist we just removed from is no longer in the index)
+        track_exists_elsewhere = bool(playlists_containing_anywhere(track_uri) - {playlist_id})
+
+        # If track doesn't exist in any other playlists, unlike it
+        if not track_exists_elsewhere:
+            record_liked([track_id], False)
+            write_queue.like_change([track_id], False)
+            message = "Removed from playlist and unliked (not in any other playlists)."
+        else:
+            message = "Removed from playlist."
+
+    else:
+        return jsonify({"error": "Invalid action"}), 400
+
+    return jsonify({"success": True, "message": message})
+
+@app.route('/api/library-index')
+def get_library_index_state():
+    fresh = sum(1 for pid in library_playlists if is_playlist_cache_fresh(pid))
+    unreadable = [
+        {"id": pid, "name": library_playlists[pid], "status": unreadable_playlists[pid][0]}
+        for pid in library_playlists if is_playlist_unreadable(pid)
+    ]
+    return jsonify({
+        "enabled": LIBRARY_INDEX,
+        "playlists": len(library_playlists),
+        "indexed": fresh,
+        # Counted as indexed with no tracks, so they don't hold the index back
+        "unreadable": unreadable,
+        "complete": LIBRARY_INDEX and library_index_complete(),
+    })
+
+@app.route('/api/pending-writes')
+def get_pending_writes():
+    """Toggles acknowledged but not yet written to Spotify, and recent write failures."""
+    return jsonify(write_queue.status())
+
+class AlbumTracksCache(TableCache):
+    """Album ID -> list of track URIs, kept in the album_tracks table.
+
+    An album's track list doesn't change once released, so entries never need invalidating.
+    """
+
+    kind = "album cache"
+    select_sql = "SELECT track_uris FROM album_tracks WHERE album_id = ?"
+    insert_sql = "INSERT OR REPLACE INTO album_tracks (album_id, track_uris) VALUES (?, ?)"
+
+    def to_row(self, track_uris):
+        return ("\n".join(track_uris),)
+
+    def from_row(self, row):
+        return [uri for uri in row[0].split("\n") if uri]
+
+album_tracks_cache = AlbumTracksCache(ALBUM_CACHE_SIZE)
+
+def get_album_track_uris(album_id):
+    """An album's track URIs in order, from the cache or else from Spotify."""
+    track_uris = album_tracks_cache.get(album_id)
+    if track_uris is None:
+        results = get_spotify().album_tracks(album_id, limit=50)
+        track_uris = [track['uri'] for track in fetch_all_items(results) if track and track.get('uri')]
+        if track_uris:
+            album_tracks_cache.put(album_id, track_uris)
+    return track_uris
+
+async def fetch_playlist_now(pid, sname):
+    return await cache_loader.fetch_now(pid, sname)
+
+def split_by_membership(pid, track_uris):
+    """(tracks in the playlist, tracks not in it), or None if the playlist can't be read.
+
+    Reads the playlist first unless it is cached at its current snapshot; an entry
+    that is only a placeholder (the loader hasn't reached it) or stale can't be diffed against.
+    """
+    if not is_playlist_cache_fresh(pid):
+        try:
+            run_async(fetch_playlist_now(pid, playlist_state.displayed.get(pid, pid)), timeout=HTTP_TIMEOUT_SECONDS * 3)
+        except Exception as e:
+            print(f"Error reading playlist {pid} for album toggle: {e}")
+            return None
+    with cache_lock:
+        present = [uri for uri in track_uris if playlist_tracks_cache.contains(pid, uri)]
+    present_set = set(present)
+    return present, [uri for uri in track_uris if uri not in present_set]
 
 @app.route('/api/playlist/toggle-album', methods=['POST'])
 def toggle_album_playlist():
@@ -679,58 +2145,54 @@ def toggle_album_playlist():
     if not all([playlist_id, album_id, action]):
         return jsonify({"error": "Missing data"}), 400
 
+    if not token_manager.token():
+        return jsonify({"error": "Not authenticated"}), 401
+
     try:
-        # Get all tracks from the album
-        album_tracks = []
-        results = sp.album_tracks(album_id, limit=50)
-        album_tracks.extend(results['items'])
-        
-        while results['next']:
-            results = sp.next(results)
-            album_tracks.extend(results['items'])
-        
-        # Extract track URIs
-        track_uris = [track['uri'] for track in album_tracks if track and track.get('uri')]
+        track_uris = get_album_track_uris(album_id)
         
         if not track_uris:
             return jsonify({"error": "No tracks found in album"}), 404
         
+        # Only touch the tracks that need it; if the playlist can't be read, send them all
+        membership = split_by_membership(playlist_id, track_uris)
+        present, missing = membership if membership is not None else (track_uris, track_uris)
+        
         if action == 'add':
-            # Add all tracks to playlist
-            # Spotify API limits to 100 tracks per request
-            for i in range(0, len(track_uris), 100):
-                batch = track_uris[i:i+100]
-                sp.playlist_add_items(playlist_id, batch)
-            
-            # Update cache
-            if playlist_id in playlist_tracks_cache:
-                playlist_tracks_cache[playlist_id].update(track_uris)
+            # Add the album tracks not already in the playlist (write_queue sends them to Spotify shortly)
+            changed = missing
+            add_tracks_to_cache(playlist_id, changed)
+            write_queue.playlist_change(playlist_id, changed, 'add')
             
-            message = f"Added {len(track_uris)} tracks from album to playlist."
+            message = f"Added {len(changed)} tracks from album to playlist ({len(track_uris) - len(changed)} already there)."
         
         elif action == 'remove':
-            # Remove all tracks from playlist
-            # Spotify API limits to 100 tracks per request
-            for i in range(0, len(track_uris), 100):
-                batch = track_uris[i:i+100]
-                sp.playlist_remove_all_occurrences_of_items(playlist_id, batch)
-            
-            # Update cache
-            if playlist_id in playlist_tracks_cache:
-                for uri in track_uris:
-                    playlist_tracks_cache[playlist_id].discard(uri)
+            # Remove the album tracks that are in the playlist
+            changed = present
+            remove_tracks_from_cache(playlist_id, changed)
+            write_queue.playlist_change(playlist_id, changed, 'remove')
             
-            message = f"Removed {len(track_uris)} tracks from album from playlist."
+            message = f"Removed {len(changed)} tracks from album from playlist ({len(track_uris) - len(changed)} weren't there)."
         
         else:
             return jsonify({"error": "Invalid action"}), 400
 
-        return jsonify({"success": True, "message": message, "track_count": len(track_uris)})
+        changed_set = set(changed)
+        return jsonify({
+            "success": True,
+            "message": message,
+            "track_count": len(track_uris),
+            "changed": changed,
+            "unchanged": [uri for uri in track_uris if uri not in changed_set],
+        })
 
     except Exception as e:
         print(f"Error toggling album in playlist: {e}")
         return jsonify({"error": str(e)}), 500
 
 if __name__ == '__main__':
-    app.run(port=8888, debug=True)
+    # The desktop app stops the backend with SIGTERM; exit normally so the atexit hooks
+    # (the write-behind flush) still run
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    app.run(port=8888, debug=True, use_reloader=FLASK_USE_RELOADER)
 
@@ -78,6 +78,8 @@ class BackendManager {
         // Inherit environment (for .env variables via python-dotenv)
         var env = ProcessInfo.processInfo.environment
         env["PYTHONUNBUFFERED"] = "1"
+        // No auto-reloader: it imports the app twice before /health answers
+        env["FLASK_USE_RELOADER"] = "0"
         proc.environment = env
 
         // Pipe stdout/stderr for debugging
@@ -151,9 +153,9 @@ class BackendManager {
         DispatchQueue.global(qos: .userInitiated).async { [weak self] in
             guard let self = self else { return }
 
-            let pollInterval: TimeInterval = 0.5
-            let maxAttempts = 40  // 40 × 0.5s = 20s max wait
-            let expectedReadyAttempt: Double = 10 // Expect ~5s typical startup
+            let pollInterval: TimeInterval = 0.1
+            let maxAttempts = 200  // 200 × 0.1s = 20s max wait
+            let expectedReadyAttempt: Double = 5 // Expect ~0.5s typical startup
 
             for attempt in 1...maxAttempts {
                 // Report estimated progress (asymptotic curve so it never quite hits 1.0)
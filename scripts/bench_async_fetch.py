@@ -0,0 +1,87 @@
+"""Benchmark: serial spotipy paging vs AsyncSpotify for a full cache refresh.
+
+Runs both clients against the in-process stub server (scripts/spotify_stub_server.py)
+with a fixed per-request latency, fetching every playlist's track URIs the way
+the cache loader does, and checks both return the same data.
+
+Usage (from the project root):
+    python scripts/bench_async_fetch.py [--playlists 40] [--tracks 450] [--latency 0.08] [--concurrency 8]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import spotipy
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from spotify_async import AsyncSpotify  # noqa: E402
+from spotify_stub_server import StubSpotifyServer  # noqa: E402
+
+
+def serial_refresh(server):
+    """What the loaders did before: one spotipy call after another."""
+    sp = spotipy.Spotify(auth="stub-token", retries=0, status_retries=0)
+    sp.prefix = server.api_url + "/"
+    result = {}
+    for pid in server.playlists:
+        uris = set()
+        results = sp.playlist_items(pid, additional_types=['track'], limit=100, fields='next,items(track(uri))')
+        uris.update(item['track']['uri'] for item in results['items'])
+        while results['next']:
+            results = sp.next(results)
+            uris.update(item['track']['uri'] for item in results['items'])
+        result[pid] = uris
+    return result
+
+
+async def async_refresh(server, concurrency):
+    async def token():
+        return "stub-token"
+
+    async with AsyncSpotify(token, base_url=server.api_url, max_in_flight=concurrency) as client:
+        pids = list(server.playlists)
+        sets = await asyncio.gather(*(client.playlist_track_uris(pid) for pid in pids))
+    return dict(zip(pids, sets))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--playlists", type=int, default=40)
+    parser.add_argument("--tracks", type=int, default=450, help="tracks per playlist")
+    parser.add_argument("--latency", type=float, default=0.08, help="seconds per stub request")
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    playlists = {
+        f"pl{i:03d}": [f"spotify:track:{i:03d}{j:019d}" for j in range(args.tracks)]
+        for i in range(args.playlists)
+    }
+    server = StubSpotifyServer(playlists=playlists, latency=args.latency).start()
+    try:
+        start = time.perf_counter()
+        serial = serial_refresh(server)
+        serial_time = time.perf_counter() - start
+        serial_requests = server.request_count
+
+        server.request_count = 0
+        server.max_in_flight = 0
+        start = time.perf_counter()
+        concurrent = asyncio.run(async_refresh(server, args.concurrency))
+        async_time = time.perf_counter() - start
+        async_requests = server.request_count
+    finally:
+        server.stop()
+
+    assert serial == concurrent, "clients returned different track sets"
+    print(f"{args.playlists} playlists x {args.tracks} tracks, {args.latency * 1000:.0f}ms per request\n")
+    print(f"serial spotipy : {serial_time:6.2f}s  ({serial_requests} requests)")
+    print(f"AsyncSpotify   : {async_time:6.2f}s  ({async_requests} requests, {server.max_in_flight} in flight)")
+    print(f"speed-up       : {serial_time / async_time:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
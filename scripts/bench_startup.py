@@ -0,0 +1,157 @@
+"""Benchmark: time from launching `python app.py` to the first 200 from /health.
+
+Exports the working tree and a baseline git revision into temporary directories
+(tracked files only, so both start with an empty cache), launches each one the
+way the desktop app does and polls /health every few milliseconds until it
+answers. Runs are alternated between the two layouts and the median is reported.
+For the working tree, the startup phase timings from /api/startup-timings are
+shown too.
+
+Dummy Spotify credentials are used when none are set; without a cached token
+neither layout talks to Spotify, so this measures startup alone.
+
+Usage (from the project root; port 8888 must be free):
+    python scripts/bench_startup.py --baseline <git revision> [--runs 5] [--reloader]
+"""
+import argparse
+import http.client
+import json
+import os
+import shutil
+import signal
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PORT = 8888
+
+
+def export_revision(revision, dest):
+    archive = subprocess.run(["git", "archive", revision], cwd=PROJECT_ROOT, check=True, capture_output=True).stdout
+    subprocess.run(["tar", "-x", "-C", dest], input=archive, check=True)
+
+
+def export_working_tree(dest):
+    files = subprocess.run(
+        ["git", "ls-files", "--cached", "--others", "--exclude-standard", "-z"],
+        cwd=PROJECT_ROOT, check=True, capture_output=True, text=True
+    ).stdout.split("\0")
+    for path in filter(None, files):
+        source = os.path.join(PROJECT_ROOT, path)
+        if os.path.isfile(source):
+            os.makedirs(os.path.dirname(os.path.join(dest, path)), exist_ok=True)
+            shutil.copy2(source, os.path.join(dest, path))
+
+
+def get(path, timeout=0.5):
+    conn = http.client.HTTPConnection("127.0.0.1", PORT, timeout=timeout)
+    try:
+        conn.request("GET", path)
+        response = conn.getresponse()
+        return response.status, response.read()
+    finally:
+        conn.close()
+
+
+def port_in_use():
+    try:
+        get("/health")
+        return True
+    except OSError:
+        return False
+
+
+def time_to_health(directory, reloader, timeout=30):
+    """Seconds until /health answers, plus the startup timings if the app reports them."""
+    env = dict(os.environ, PYTHONUNBUFFERED="1", FLASK_USE_RELOADER="1" if reloader else "0")
+    env.setdefault("SPOTIPY_CLIENT_ID", "bench")
+    env.setdefault("SPOTIPY_CLIENT_SECRET", "bench")
+    env.setdefault("SPOTIPY_REDIRECT_URI", f"http://127.0.0.1:{PORT}/callback")
+    start = time.perf_counter()
+    # Own process group, so the reloader's child goes down with it
+    proc = subprocess.Popen(
+        [sys.executable, "app.py"], cwd=directory, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, start_new_session=True
+    )
+    try:
+        while True:
+            try:
+                status, _ = get("/health")
+                if status == 200:
+                    elapsed = time.perf_counter() - start
+                    break
+            except OSError:
+                pass
+            if proc.poll() is not None:
+                raise RuntimeError(f"app.py in {directory} exited with status {proc.returncode}")
+            if time.perf_counter() - start > timeout:
+                raise RuntimeError(f"/health did not answer within {timeout}s")
+            time.sleep(0.005)
+        # Give the background warm-up a moment to finish so its phases are reported too
+        timings = None
+        deadline = time.perf_counter() + 5
+        while time.perf_counter() < deadline:
+            try:
+                status, body = get("/api/startup-timings", timeout=2)
+            except OSError:
+                break
+            if status != 200:
+                break
+            timings = json.loads(body)
+            if "playlists_loaded" in timings:
+                break
+            time.sleep(0.05)
+        return elapsed, timings
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.wait()
+        # Wait for the port to be released before the next run
+        while port_in_use():
+            time.sleep(0.05)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--baseline", required=True, help="git revision to compare the working tree against")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--reloader", action="store_true", help="run with Flask's auto-reloader on (layouts without FLASK_USE_RELOADER always use it)")
+    args = parser.parse_args()
+
+    if port_in_use():
+        sys.exit(f"Port {PORT} is already in use; stop the running backend first.")
+
+    with tempfile.TemporaryDirectory() as baseline_dir, tempfile.TemporaryDirectory() as current_dir:
+        export_revision(args.baseline, baseline_dir)
+        export_working_tree(current_dir)
+
+        results = {"baseline": [], "current": []}
+        timings = []
+        for _ in range(args.runs):
+            elapsed, _ = time_to_health(baseline_dir, args.reloader)
+            results["baseline"].append(elapsed)
+            elapsed, phase_timings = time_to_health(current_dir, args.reloader)
+            results["current"].append(elapsed)
+            if phase_timings:
+                timings.append(phase_timings)
+
+    print(f"time to first /health, median of {args.runs} runs (reloader {'on' if args.reloader else 'off'})\n")
+    baseline = statistics.median(results["baseline"])
+    current = statistics.median(results["current"])
+    label = f"baseline ({args.baseline})"
+    width = max(len(label), len("working tree"))
+    print(f"{label:<{width}} : {baseline * 1000:7.0f}ms")
+    print(f"{'working tree':<{width}} : {current * 1000:7.0f}ms")
+    print(f"{'speed-up':<{width}} : {baseline / current:7.1f}x")
+    if timings:
+        print("\nworking tree startup phases (median ms since process start):")
+        # jsonify sorts keys; list the phases in the order they were reached
+        for phase in sorted(timings[-1], key=timings[-1].get):
+            values = [t[phase] for t in timings if phase in t]
+            print(f"  {phase:<22}{statistics.median(values):8.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Benchmark: per-request token check, new SpotifyOAuth per request vs TokenManager.
+
+Before, every authenticated route built a SpotifyOAuth and ran
+validate_token(get_cached_token()), reading the token cache file each time.
+This times that against TokenManager.token(), which answers from memory, using
+a temporary cache file holding a valid (unexpired) token, so neither side
+talks to Spotify.
+
+Usage (from the project root):
+    python scripts/bench_token_check.py [--checks 2000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import warnings
+
+from spotipy.oauth2 import SpotifyOAuth
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from token_manager import TokenManager  # noqa: E402
+
+SCOPE = "user-read-playback-state user-library-read"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--checks", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache_path = os.path.join(directory, ".cache")
+        with open(cache_path, "w") as f:
+            json.dump({
+                "access_token": "bench", "refresh_token": "bench", "token_type": "Bearer",
+                "scope": SCOPE, "expires_in": 3600, "expires_at": int(time.time()) + 3600,
+            }, f)
+
+        def auth_manager():
+            return SpotifyOAuth(
+                client_id="bench", client_secret="bench", redirect_uri="http://127.0.0.1:8888/callback",
+                scope=SCOPE, open_browser=False, cache_path=cache_path
+            )
+
+        # get_cached_token warns that it is deprecated on every call
+        warnings.simplefilter("ignore", DeprecationWarning)
+        start = time.perf_counter()
+        for _ in range(args.checks):
+            manager = auth_manager()
+            assert manager.validate_token(manager.get_cached_token())
+        per_request = (time.perf_counter() - start) / args.checks
+
+        token_manager = TokenManager(auth_manager)
+        start = time.perf_counter()
+        for _ in range(args.checks):
+            assert token_manager.token()
+        in_memory = (time.perf_counter() - start) / args.checks
+
+    print(f"{args.checks} token checks\n")
+    print(f"SpotifyOAuth per request : {per_request * 1e6:8.1f}us per check")
+    print(f"TokenManager             : {in_memory * 1e6:8.1f}us per check")
+    print(f"speed-up                 : {per_request / in_memory:8.0f}x")
+
+
+if __name__ == "__main__":
+    main()
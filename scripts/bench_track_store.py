@@ -0,0 +1,102 @@
+"""Memory benchmark: set-of-strings playlist cache vs the compact TrackStore.
+
+Builds the same synthetic library both ways and reports the memory held by
+each layout (measured with tracemalloc) plus membership lookup speed.
+
+The baseline mirrors the previous cache: Playlist ID -> set of
+`spotify:track:<id>` strings, plus the Track URI -> set of Playlist IDs index.
+Every entry gets its own string object, as it does when the URIs come out of
+JSON responses.
+
+Usage (from the project root):
+    python scripts/bench_track_store.py [--playlists 150] [--tracks-per-playlist 1500] [--unique-tracks 60000]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from track_store import TrackStore, encode_track_id  # noqa: E402
+
+
+def make_library(num_playlists, tracks_per_playlist, unique_tracks, seed=42):
+    rng = random.Random(seed)
+    track_ids = [encode_track_id(rng.getrandbits(128)) for _ in range(unique_tracks)]
+    library = {}
+    for i in range(num_playlists):
+        size = max(1, int(rng.gauss(tracks_per_playlist, tracks_per_playlist / 3)))
+        library[f"playlist{i:04d}"] = rng.sample(track_ids, min(size, unique_tracks))
+    return track_ids, library
+
+
+def build_string_sets(library):
+    cache = {}
+    index = {}
+    for pid, ids in library.items():
+        # "".join builds a fresh string per entry, like json.loads does
+        uris = {"".join(("spotify:track:", track_id)) for track_id in ids}
+        cache[pid] = uris
+        for uri in uris:
+            index.setdefault(uri, set()).add(pid)
+    return cache, index
+
+
+def build_track_store(library):
+    store = TrackStore()
+    for pid, ids in library.items():
+        store.set_tracks(pid, ["".join(("spotify:track:", track_id)) for track_id in ids])
+    return store
+
+
+def measure(build, library):
+    # Time an untraced build; tracemalloc itself slows allocation-heavy code down a lot
+    start = time.perf_counter()
+    build(library)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    result = build(library)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--playlists", type=int, default=150)
+    parser.add_argument("--tracks-per-playlist", type=int, default=1500)
+    parser.add_argument("--unique-tracks", type=int, default=60000)
+    parser.add_argument("--lookups", type=int, default=20000)
+    args = parser.parse_args()
+
+    track_ids, library = make_library(args.playlists, args.tracks_per_playlist, args.unique_tracks)
+    memberships = sum(len(ids) for ids in library.values())
+    print(f"Library: {len(library)} playlists, {memberships:,} playlist entries, {len(track_ids):,} distinct tracks\n")
+
+    (cache, index), set_bytes, set_build = measure(build_string_sets, library)
+    store, store_bytes, store_build = measure(build_track_store, library)
+
+    probes = ["spotify:track:" + random.Random(1).choice(track_ids) for _ in range(args.lookups)]
+    start = time.perf_counter()
+    for uri in probes:
+        index.get(uri)
+    set_lookup = (time.perf_counter() - start) / len(probes) * 1e6
+    start = time.perf_counter()
+    for uri in probes:
+        store.playlists_containing(uri)
+    store_lookup = (time.perf_counter() - start) / len(probes) * 1e6
+
+    print(f"{'layout':<24}{'memory':>12}{'bytes/entry':>14}{'build':>10}{'lookup':>12}")
+    for name, size, build, lookup in [
+        ("set of URI strings", set_bytes, set_build, set_lookup),
+        ("TrackStore", store_bytes, store_build, store_lookup),
+    ]:
+        print(f"{name:<24}{size / 2**20:>10.1f}MB{size / memberships:>14.1f}{build:>9.2f}s{lookup:>10.2f}us")
+    print(f"\nMemory reduction: {set_bytes / store_bytes:.1f}x ({(1 - store_bytes / set_bytes) * 100:.0f}% less)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""In-process stand-in for the Spotify Web API read endpoints.
+
+Serves a synthetic library on 127.0.0.1 with configurable per-request latency,
+so the sync and async clients can be exercised and compared without touching
+Spotify or spending rate-limit quota. Implements just what the cache loaders
+use:
+
+    GET /v1/me/playlists
+    GET /v1/playlists/{id}/items
+    GET /v1/albums/{id}/tracks
+
+with `limit`/`offset` paging, `next` links and `total`. Setting `fail_with_429`
+makes the next N requests answer 429 with a Retry-After header.
+
+    server = StubSpotifyServer(playlists={"pl1": ["spotify:track:...", ...]}, latency=0.05)
+    server.start()
+    ... point a client at server.api_url ...
+    server.stop()
+"""
+import asyncio
+import threading
+
+from aiohttp import web
+
+
+class StubSpotifyServer:
+    def __init__(self, playlists=None, albums=None, latency=0.0, retry_after=1):
+        self.playlists = playlists or {}   # Playlist ID -> list of track URIs
+        self.albums = albums or {}         # Album ID -> list of track URIs
+        self.latency = latency
+        self.retry_after = retry_after
+        self.fail_with_429 = 0
+        self.request_count = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.loop = None
+        self.runner = None
+        self.port = None
+        self.thread = None
+
+    @property
+    def api_url(self):
+        return f"http://127.0.0.1:{self.port}/v1"
+
+    def _page(self, request, items, make_item, default_limit):
+        limit = int(request.query.get("limit", default_limit))
+        offset = int(request.query.get("offset", 0))
+        page = items[offset:offset + limit]
+        next_url = None
+        if offset + limit < len(items):
+            query = dict(request.query, offset=str(offset + limit), limit=str(limit))
+            next_url = str(request.url.with_query(query))
+        return web.json_response({
+            "items": [make_item(i, item) for i, item in enumerate(page, offset)],
+            "next": next_url,
+            "total": len(items),
+            "offset": offset,
+            "limit": limit,
+        })
+
+    @web.middleware
+    async def _simulate(self, request, handler):
+        self.request_count += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            if self.fail_with_429 > 0:
+                self.fail_with_429 -= 1
+                return web.json_response(
+                    {"error": {"status": 429, "message": "API rate limit exceeded"}},
+                    status=429,
+                    headers={"Retry-After": str(self.retry_after)},
+                )
+            return await handler(request)
+        finally:
+            self.in_flight -= 1
+
+    async def _user_playlists(self, request):
+        items = list(self.playlists.items())
+        return self._page(request, items, lambda i, entry: {
+            "id": entry[0],
+            "name": entry[0],
+            "snapshot_id": f"snapshot-{entry[0]}-{len(entry[1])}",
+            "tracks": {"total": len(entry[1])},
+        }, 20)
+
+    async def _playlist_tracks(self, request):
+        uris = self.playlists.get(request.match_info["playlist_id"])
+        if uris is None:
+            return web.json_response({"error": {"status": 404, "message": "Not found"}}, status=404)
+        return self._page(request, uris, lambda i, uri: {"track": {"uri": uri}}, 100)
+
+    async def _album_tracks(self, request):
+        uris = self.albums.get(request.match_info["album_id"])
+        if uris is None:
+            return web.json_response({"error": {"status": 404, "message": "Not found"}}, status=404)
+        return self._page(request, uris, lambda i, uri: {"uri": uri, "id": uri.rsplit(":", 1)[-1], "track_number": i + 1}, 20)
+
+    def _app(self):
+        app = web.Application(middlewares=[self._simulate])
+        app.router.add_get("/v1/me/playlists", self._user_playlists)
+        app.router.add_get("/v1/playlists/{playlist_id}/items", self._playlist_tracks)
+        app.router.add_get("/v1/albums/{album_id}/tracks", self._album_tracks)
+        app.router.add_get("/v1/albums/{album_id}/tracks/", self._album_tracks)
+        return app
+
+    async def start_async(self):
+        """Start on the running event loop."""
+        self.runner = web.AppRunner(self._app())
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        self.port = site._server.sockets[0].getsockname()[1]
+
+    async def stop_async(self):
+        await self.runner.cleanup()
+
+    def start(self):
+        """Start on a background thread with its own event loop."""
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True, name="spotify-stub")
+        self.thread.start()
+        asyncio.run_coroutine_threadsafe(self.start_async(), self.loop).result()
+        return self
+
+    def stop(self):
+        asyncio.run_coroutine_threadsafe(self.stop_async(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
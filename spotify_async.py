@@ -0,0 +1,233 @@
+"""Asyncio Spotify Web API client for the bulk read paths.
+
+spotipy is synchronous, so paging through a large library means one round trip
+after another. AsyncSpotify keeps up to `max_in_flight` requests open at once on
+a single aiohttp connection pool, so bulk refreshes are bound by the request
+budget (the shared rate limiter) rather than by latency.
+
+Only the read endpoints the cache loaders need are implemented. Errors raise
+SpotifyAsyncError, which carries `http_status` and `headers` like spotipy's
+SpotifyException so callers can handle both the same way. A 429 is reported to
+the rate limiter (which pauses everyone for the Retry-After window) and the
+request is retried once the pause is over.
+"""
+import asyncio
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+API_BASE_URL = "https://api.spotify.com/v1"
+
+
+def retry_after_seconds(headers, default=5):
+    """Seconds to back off for a 429, from its Retry-After header."""
+    try:
+        return max(1, int((headers or {}).get("Retry-After", default)))
+    except (TypeError, ValueError):
+        return default
+
+
+def remaining_page_urls(first_page):
+    """URLs of every page after `first_page`, derived from its `next` link and `total`.
+
+    Returns None when the page doesn't carry enough to compute them (no `total`),
+    in which case callers fall back to following `next` links one by one.
+    """
+    next_url = first_page.get("next")
+    total = first_page.get("total")
+    if not next_url:
+        return []
+    if total is None:
+        return None
+    parts = urlsplit(next_url)
+    query = dict(parse_qsl(parts.query))
+    try:
+        offset = int(query["offset"])
+        limit = int(query["limit"])
+    except (KeyError, ValueError):
+        return None
+    urls = []
+    for page_offset in range(offset, total, limit):
+        query["offset"] = str(page_offset)
+        urls.append(urlunsplit(parts._replace(query=urlencode(query))))
+    return urls
+
+
+def _page_offset(url):
+    return int(dict(parse_qsl(urlsplit(url).query)).get("offset", 0))
+
+
+def _track_uris(items):
+    return [item["track"]["uri"] for item in items if item.get("track") and item["track"].get("uri")]
+
+
+class SpotifyAsyncError(Exception):
+    def __init__(self, http_status, msg, headers=None):
+        super().__init__(f"http status: {http_status}, {msg}")
+        self.http_status = http_status
+        self.msg = msg
+        self.headers = headers or {}
+
+
+class AsyncSpotify:
+    """Minimal asyncio Spotify client.
+
+    `token_provider` is a coroutine function returning a valid access token.
+    `rate_limiter` needs a `reserve()` method returning the seconds to wait before
+    the request may go out (the app's RequestGovernor), so sync and async callers
+    share one budget. If it also has `backoff(seconds)` and `pause_remaining()`,
+    429s are reported to it and requests wait out the pause it imposes.
+    A 429 is retried up to `max_retries` times when its Retry-After is at most
+    `max_retry_after` seconds; otherwise the SpotifyAsyncError is raised.
+    """
+
+    def __init__(self, token_provider, rate_limiter=None, base_url=API_BASE_URL, max_in_flight=8, timeout=10,
+                 max_retries=3, max_retry_after=60):
+        self.token_provider = token_provider
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.max_retry_after = max_retry_after
+        self.base_url = base_url.rstrip("/")
+        self.max_in_flight = max_in_flight
+        self.timeout = timeout
+        self.session = None
+        self.in_flight = None
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def open(self):
+        # aiohttp is slow to import; wait until the first request needs it
+        import aiohttp
+        if self.session is None:
+            # Made here, on the loop that will use it, not at construction
+            self.in_flight = asyncio.Semaphore(self.max_in_flight)
+            connector = aiohttp.TCPConnector(limit=self.max_in_flight, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def _wait_turn(self):
+        if self.rate_limiter is None:
+            return
+        wait = self.rate_limiter.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        # A 429 elsewhere may have started a back-off while we waited
+        pause_remaining = getattr(self.rate_limiter, "pause_remaining", None)
+        while pause_remaining is not None and (wait := pause_remaining()) > 0:
+            await asyncio.sleep(wait)
+
+    async def get(self, url, params=None):
+        """GET an API path (e.g. "/me/playlists") or a full `next` URL and return the JSON body."""
+        if not url.startswith("http"):
+            url = self.base_url + url
+        await self.open()
+        attempt = 0
+        while True:
+            try:
+                return await self._get(url, params)
+            except SpotifyAsyncError as e:
+                if e.http_status != 429:
+                    raise
+                retry_after = retry_after_seconds(e.headers)
+                backoff = getattr(self.rate_limiter, "backoff", None)
+                if backoff is not None:
+                    backoff(retry_after)
+                if attempt >= self.max_retries or retry_after > self.max_retry_after:
+                    raise
+                if backoff is None:
+                    await asyncio.sleep(retry_after)
+                attempt += 1
+
+    async def _get(self, url, params):
+        import aiohttp
+        async with self.in_flight:
+            await self._wait_turn()
+            headers = {"Authorization": f"Bearer {await self.token_provider()}"}
+            async with self.session.get(url, params=params, headers=headers) as response:
+                if response.status >= 400:
+                    try:
+                        body = await response.json(content_type=None)
+                        msg = body.get("error", {}).get("message")
+                    except (ValueError, AttributeError, aiohttp.ContentTypeError):
+                        msg = await response.text()
+                    raise SpotifyAsyncError(response.status, f"{response.url}:\n {msg}", dict(response.headers))
+                return await response.json(content_type=None)
+
+    async def collect_pages(self, first_page):
+        """Every item of a paged result, in order.
+
+        Once the first page tells us the total, the remaining pages are requested
+        concurrently by offset (still bounded by max_in_flight and the rate limiter).
+        """
+        urls = remaining_page_urls(first_page)
+        items = list(first_page["items"])
+        if urls is None:
+            page = first_page
+            while page.get("next"):
+                page = await self.get(page["next"])
+                items.extend(page["items"])
+            return items
+        for page in await asyncio.gather(*(self.get(url) for url in urls)):
+            items.extend(page["items"])
+        return items
+
+    async def playlist_track_uris(self, playlist_id, pages=None, on_page=None):
+        """Set of track URIs in a playlist.
+
+        `pages` (offset -> list of URIs) is filled in as pages arrive. Passing the
+        dict from an attempt that failed part-way fetches only the missing pages
+        (the first page is always re-read for the total). `on_page(uris)` is
+        called with each page's URIs as it arrives.
+        """
+        pages = {} if pages is None else pages
+
+        def store(offset, items):
+            pages[offset] = _track_uris(items)
+            if on_page is not None:
+                on_page(pages[offset])
+
+        first = await self.get(
+            f"/playlists/{playlist_id}/items",
+            params={"limit": 100, "additional_types": "track", "fields": "next,total,items(track(uri))"},
+        )
+        store(0, first["items"])
+        urls = remaining_page_urls(first)
+        if urls is None:
+            page = first
+            while page.get("next"):
+                offset = _page_offset(page["next"])
+                page = await self.get(page["next"])
+                store(offset, page["items"])
+        else:
+            async def fetch(offset, url):
+                page = await self.get(url)
+                store(offset, page["items"])
+
+            missing = [(offset, url) for offset, url in ((_page_offset(url), url) for url in urls) if offset not in pages]
+            tasks = [asyncio.ensure_future(fetch(offset, url)) for offset, url in missing]
+            try:
+                await asyncio.gather(*tasks)
+            except BaseException:
+                # One page failed (or we were cancelled); stop the others rather than leave them running
+                for task in tasks:
+                    task.cancel()
+                raise
+            # Pages kept from an earlier attempt may lie past the end if the playlist shrank
+            for offset in [offset for offset in pages if offset >= first["total"]]:
+                del pages[offset]
+        return set().union(*pages.values())
+
+    async def current_user_playlists(self):
+        """Every playlist in the user's library (simplified playlist objects)."""
+        first = await self.get("/me/playlists", params={"limit": 50})
+        return await self.collect_pages(first)
@@ -0,0 +1,38 @@
+"""spotipy client that sends every request through the app's request governor.
+
+Kept in its own module so app.py can import spotipy (slow to import) only when
+the client is first needed, after the server is already answering /health.
+"""
+import spotipy
+
+from spotify_async import retry_after_seconds
+
+
+class RateLimitedSpotify(spotipy.Spotify):
+    """Spotify client whose every API request goes through `governor` (the app's RequestGovernor).
+
+    A 429 pauses everyone for its Retry-After; the request is then sent again
+    (writes included, since Spotify did not process it), up to `max_retries`
+    times and only for back-offs of at most `max_retry_after` seconds.
+    """
+
+    def __init__(self, governor, max_retries=3, max_retry_after=60, **kwargs):
+        super().__init__(**kwargs)
+        self.governor = governor
+        self.max_429_retries = max_retries
+        self.max_retry_after = max_retry_after
+
+    def _internal_call(self, method, url, payload, params):
+        attempt = 0
+        while True:
+            self.governor.acquire()
+            try:
+                return super()._internal_call(method, url, payload, params)
+            except spotipy.exceptions.SpotifyException as e:
+                if e.http_status != 429:
+                    raise
+                retry_after = retry_after_seconds(e.headers)
+                self.governor.backoff(retry_after)
+                if attempt >= self.max_429_retries or retry_after > self.max_retry_after:
+                    raise
+                attempt += 1
@@ -68,13 +68,15 @@ function handleVisibilityChange() {
 
 let playlistRetryCount = 0;
 const MAX_PLAYLIST_RETRIES = 30;
+// Backend playlist state version the rendered list came from (X-State-Version)
+let playlistStateVersion = null;
 
 async function init() {
   // 1. Fetch initial Playlists (Static info)
   await fetchPlaylists();
 
-  // 2. Start Polling for Current Track
-  pollCurrentTrack();
+  // 2. Follow the Current Track (pushed by the backend)
+  startTrackStream();
 }
 
 async function fetchPlaylists() {
@@ -100,6 +102,7 @@ async function fetchPlaylists() {
     if (!res.ok) throw new Error(`Failed to fetch playlists: ${res.status}`);
 
     allPlaylists = await res.json();
+    playlistStateVersion = res.headers.get("X-State-Version");
 
     // Check if backend is still loading playlists
     const loadingState = res.headers.get("X-Loading-State");
@@ -215,34 +218,91 @@ function applyDynamicBackground(color) {
 let pollInterval = 10000;
 let consecutiveErrors = 0;
 
-async function pollCurrentTrack() {
-  try {
-    const res = await fetch("/api/current-track");
+/**
+ * Subscribe to the backend's now-playing stream (Server-Sent Events).
+ * The backend polls Spotify once for all open views; falls back to polling
+ * /api/current-track if the stream can't be opened.
+ */
+function startTrackStream() {
+  if (!window.EventSource) {
+    pollCurrentTrack();
+    return;
+  }
 
-    if (res.status === 429) {
-      const data = await res.json();
-      const retryAfter = data.retry_after || 5;
+  const stream = new EventSource("/api/current-track/stream");
+  stream.onmessage = async (event) => {
+    const state = JSON.parse(event.data);
+    if (state.retry_after) {
+      showRateLimited(state.retry_after);
+    } else if (!state.error || state.track) {
+      await handleTrackUpdate(state.track);
+    }
+  };
+  stream.onerror = () => {
+    // EventSource reconnects on its own unless the server refused the stream
+    if (stream.readyState === EventSource.CLOSED) {
+      console.warn("Now-playing stream closed, falling back to polling");
+      pollCurrentTrack();
+    }
+  };
+}
 
-      console.warn(`Rate limited, Retry-After: ${retryAfter}s`);
-      const trackTitleEl =
-        document.getElementById("track-title") ||
-        document.getElementById("track-name");
-      if (trackTitleEl) trackTitleEl.textContent = "Spotify Rate Limited";
+function showRateLimited(retryAfter) {
+  console.warn(`Rate limited, Retry-After: ${retryAfter}s`);
+  const trackTitleEl =
+    document.getElementById("track-title") ||
+    document.getElementById("track-name");
+  if (trackTitleEl) trackTitleEl.textContent = "Spotify Rate Limited";
+
+  // Start Countdown
+  let timeLeft = retryAfter;
+  document.getElementById("artist-name").textContent =
+    `Retrying in ${timeLeft}s...`;
 
-      // Start Countdown
-      let timeLeft = retryAfter;
+  const countdownInterval = setInterval(() => {
+    timeLeft--;
+    if (timeLeft > 0) {
       document.getElementById("artist-name").textContent =
         `Retrying in ${timeLeft}s...`;
+    } else {
+      clearInterval(countdownInterval);
+    }
+  }, 1000);
+}
 
-      const countdownInterval = setInterval(() => {
-        timeLeft--;
-        if (timeLeft > 0) {
-          document.getElementById("artist-name").textContent =
-            `Retrying in ${timeLeft}s...`;
-        } else {
-          clearInterval(countdownInterval);
+async function handleTrackUpdate(track) {
+  if (track) {
+    const idChanged = !currentTrack || currentTrack.id !== track.id;
+    const statusChanged =
+      !currentTrack || currentTrack.is_playing !== track.is_playing;
+
+    if (idChanged || statusChanged) {
+      currentTrack = track;
+      updateTrackInfo(track);
+      if (idChanged) {
+        try {
+          // Optimistically render to ensure headers/visuals are right,
+          // checks will come later
+          renderPlaylists();
+          await checkPlaylists(track.uri);
+        } catch (err) {
+          console.error("Error checking playlists:", err);
         }
-      }, 1000);
+      }
+    }
+  } else {
+    updateTrackInfo(null);
+  }
+}
+
+async function pollCurrentTrack() {
+  try {
+    const res = await fetch("/api/current-track");
+
+    if (res.status === 429) {
+      const data = await res.json();
+      const retryAfter = data.retry_after || 5;
+      showRateLimited(retryAfter);
 
       // Set next poll
       pollInterval = retryAfter * 1000 + 500; // Add buffer
@@ -250,29 +310,16 @@ async function pollCurrentTrack() {
       consecutiveErrors = 0;
       pollInterval = 10000; // Reset to 10s
 
-      const track = await res.json();
-      if (track) {
-        const idChanged = !currentTrack || currentTrack.id !== track.id;
-        const statusChanged =
-          !currentTrack || currentTrack.is_playing !== track.is_playing;
-
-        if (idChanged || statusChanged) {
-          currentTrack = track;
-          updateTrackInfo(track);
-          if (idChanged) {
-            try {
-              // Optimistically render to ensure headers/visuals are right,
-              // checks will come later
-              renderPlaylists();
-              await checkPlaylists(track.uri);
-            } catch (err) {
-              console.error("Error checking playlists:", err);
-            }
-          }
-        }
-      } else {
-        updateTrackInfo(null);
+      // Poll again right after the current track is predicted to end
+      const nextChangeAt = Number(res.headers.get("X-Next-Change-At"));
+      if (nextChangeAt && !document.hidden) {
+        pollInterval = Math.min(
+          Math.max(nextChangeAt - Date.now() + 1000, 2000),
+          pollInterval,
+        );
       }
+
+      await handleTrackUpdate(await res.json());
     } else {
       // Other errors (500, etc)
       consecutiveErrors++;
@@ -287,15 +334,36 @@ async function pollCurrentTrack() {
   setTimeout(pollCurrentTrack, pollInterval);
 }
 
-async function checkPlaylists(trackUri) {
+let pendingCheckTimer = null;
+const MAX_PENDING_CHECKS = 30;
+
+async function checkPlaylists(trackUri, attempt = 0) {
+  clearTimeout(pendingCheckTimer);
   try {
     const res = await fetch(
       `/api/check-playlists?track_uri=${encodeURIComponent(trackUri)}`,
     );
     if (res.ok) {
       const activeIds = await res.json();
+      // The track changed while we were waiting; its own check will render
+      if (currentTrack && currentTrack.uri !== trackUri) return;
       activePlaylistsMap = new Set(activeIds);
-      renderPlaylists();
+      const stateVersion = res.headers.get("X-State-Version");
+      if (stateVersion && stateVersion !== playlistStateVersion) {
+        // The backend reloaded its playlist lists (e.g. a CSV was edited); fetch ours again
+        await fetchPlaylists();
+      } else {
+        renderPlaylists();
+      }
+
+      // Some playlists weren't checked in time; ask again once the backend has cached them
+      const pending = res.headers.get("X-Pending-Playlists");
+      if (pending && attempt < MAX_PENDING_CHECKS) {
+        pendingCheckTimer = setTimeout(
+          () => checkPlaylists(trackUri, attempt + 1),
+          1000,
+        );
+      }
     }
   } catch (e) {
     console.error("Error checking playlists:", e);
@@ -330,8 +398,11 @@ function updateTrackInfo(track) {
       if (artist) artist.textContent = track.artist;
     }
 
-    // Extract dominant color and update background
-    if (track.album_cover) {
+    // Update background: the backend sends the color with the track,
+    // older responses without it fall back to a separate extraction
+    if (track.color) {
+      applyDynamicBackground(track.color);
+    } else if (track.album_cover) {
       extractDominantColor(track.album_cover, track.id)
         .then((color) => applyDynamicBackground(color))
         .catch((err) => console.warn("Color extraction failed:", err));
@@ -524,9 +595,9 @@ async function togglePlaylist(playlist) {
       renderPlaylists();
       alert("Failed to update playlist: " + data.error);
     } else if (isQueue && data.track_count) {
-      // Show success message with track count for album operations
+      // Show success message with track counts for album operations
       console.log(
-        `${action === "add" ? "Added" : "Removed"} ${data.track_count} tracks from album`,
+        `${action === "add" ? "Added" : "Removed"} ${data.changed.length} of ${data.track_count} tracks from album`,
       );
     }
   } catch (e) {
@@ -0,0 +1,51 @@
+import os
+import sys
+import threading
+
+import pytest
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
+sys.path.insert(0, os.path.join(PROJECT_ROOT, "scripts"))
+
+from spotify_stub_server import StubSpotifyServer  # noqa: E402
+
+
+def track_uris(prefix, count):
+    return [f"spotify:track:{prefix}{i:018d}" for i in range(count)]
+
+
+@pytest.fixture
+def stub():
+    server = StubSpotifyServer().start()
+    yield server
+    server.stop()
+
+
+@pytest.fixture(scope="session")
+def app_module(tmp_path_factory):
+    """app.py, imported from an empty directory (it keeps its caches and CSVs under relative paths)."""
+    os.environ.setdefault("SPOTIPY_CLIENT_ID", "test")
+    os.environ.setdefault("SPOTIPY_CLIENT_SECRET", "test")
+    os.environ.setdefault("SPOTIPY_REDIRECT_URI", "http://127.0.0.1:8888/callback")
+    # Don't let the shared request budget slow the tests down
+    os.environ["SPOTIFY_REQUESTS_PER_SECOND"] = "1000"
+    os.environ["SPOTIFY_REQUEST_BURST"] = "1000"
+    os.chdir(tmp_path_factory.mktemp("app"))
+    import app
+    # Without a token the warm-up stops after restoring the (empty) caches; let it finish first
+    for thread in threading.enumerate():
+        if thread.name == "warm-up":
+            thread.join()
+    return app
+
+
+@pytest.fixture
+def app_with_stub(app_module, stub, monkeypatch):
+    """app.py with its async client pointed at the stub server."""
+    async def token():
+        return "stub-token"
+
+    monkeypatch.setattr(app_module.async_sp, "base_url", stub.api_url)
+    monkeypatch.setattr(app_module.async_sp, "token_provider", token)
+    return app_module
@@ -0,0 +1,61 @@
+import pytest
+
+from conftest import track_uris
+
+
+@pytest.fixture
+def queued(app_with_stub, monkeypatch):
+    """Playlist writes the toggles queue, as (playlist ID, track URIs, action)."""
+    changes = []
+    monkeypatch.setattr(app_with_stub.token_manager, "token", lambda: {"access_token": "stub-token"})
+    monkeypatch.setattr(app_with_stub.write_queue, "playlist_change", lambda pid, uris, action: changes.append((pid, list(uris), action)))
+    return changes
+
+
+def toggle_response(app, pid, album_id, action):
+    return app.app.test_client().post('/api/playlist/toggle-album', json={'playlist_id': pid, 'album_id': album_id, 'action': action})
+
+
+def toggle(app, pid, album_id, action):
+    return toggle_response(app, pid, album_id, action).json
+
+
+def setup_queue_playlist(app, stub, monkeypatch, pid, album):
+    # 8 of the album's 12 tracks are in the playlist; the page has only given it a placeholder entry
+    stub.playlists = {pid: album[:8] + track_uris(pid, 5)}
+    app.album_tracks_cache.put(f"album-{pid}", album)
+    monkeypatch.setitem(app.playlist_snapshots, pid, "snapshot-1")
+    app.ensure_playlist_cache_entry(pid)
+
+
+def test_remove_reads_a_placeholder_playlist_first(app_with_stub, stub, queued, monkeypatch):
+    app = app_with_stub
+    album = track_uris("album1", 12)
+    setup_queue_playlist(app, stub, monkeypatch, "queue1", album)
+    result = toggle(app, "queue1", "album-queue1", "remove")
+    assert result["changed"] == album[:8]
+    assert queued == [("queue1", album[:8], "remove")]
+
+
+def test_add_skips_tracks_already_in_a_placeholder_playlist(app_with_stub, stub, queued, monkeypatch):
+    app = app_with_stub
+    album = track_uris("album2", 12)
+    setup_queue_playlist(app, stub, monkeypatch, "queue2", album)
+    result = toggle(app, "queue2", "album-queue2", "add")
+    assert result["changed"] == album[8:]
+    assert queued == [("queue2", album[8:], "add")]
+    # Now cached at the current snapshot, so the next toggle doesn't read it again
+    requests = stub.request_count
+    toggle(app, "queue2", "album-queue2", "remove")
+    assert stub.request_count == requests
+    assert queued[-1] == ("queue2", album, "remove")
+
+
+def test_toggles_need_a_token(app_module, queued, monkeypatch):
+    monkeypatch.setattr(app_module.token_manager, "token", lambda: None)
+    client = app_module.app.test_client()
+    response = client.post('/api/playlist/toggle', json={'playlist_id': 'p', 'track_uri': 'spotify:track:x', 'action': 'add'})
+    assert response.status_code == 401
+    assert toggle_response(app_module, "p", "album", "add").status_code == 401
+    assert queued == []
+    assert app_module.write_queue.liked_ops == {}
@@ -0,0 +1,40 @@
+import asyncio
+
+from conftest import track_uris
+
+
+def test_fetch_now_joins_the_fetch_in_flight(app_with_stub, stub):
+    app = app_with_stub
+    uris = track_uris("f", 250)
+    stub.playlists = {"join": uris}
+    stub.latency = 0.1
+    late_pages = []
+
+    async def fetch_twice():
+        first = app.cache_loader.fetch_now("join", "join")
+        # The first page is in, the other two are still in flight
+        await asyncio.sleep(0.15)
+        second = app.cache_loader.fetch_now("join", "join", on_page=late_pages.append)
+        assert second is first
+        return await first
+
+    assert app.run_async(fetch_twice(), timeout=10) == set(uris)
+    assert stub.request_count == 3
+    # The late listener got the page already read as well as the ones after it
+    assert len(late_pages) == 3
+    assert set().union(*late_pages) == set(uris)
+    assert set(app.playlist_tracks_cache.track_uris("join")) == set(uris)
+    assert "join" not in app.cache_loader.fetches
+
+
+def test_fetch_now_after_a_fetch_starts_a_new_one(app_with_stub, stub):
+    app = app_with_stub
+    stub.playlists = {"again": track_uris("g", 20)}
+
+    async def fetch():
+        return await app.cache_loader.fetch_now("again", "again")
+
+    app.run_async(fetch(), timeout=10)
+    stub.playlists["again"] = track_uris("g", 30)
+    assert app.run_async(fetch(), timeout=10) == set(stub.playlists["again"])
+    assert stub.request_count == 2
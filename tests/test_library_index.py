@@ -0,0 +1,61 @@
+import pytest
+
+from conftest import track_uris
+
+
+async def fetch(app, pid):
+    return await app.cache_loader.fetch_now(pid, pid)
+
+
+def listing(**snapshots):
+    return [{"id": pid, "name": pid.title(), "snapshot_id": snapshot} for pid, snapshot in snapshots.items()]
+
+
+@pytest.fixture
+def library(app_with_stub, monkeypatch):
+    app = app_with_stub
+    monkeypatch.setattr(app, "LIBRARY_INDEX", True)
+    monkeypatch.setattr(app, "library_playlists", {})
+    monkeypatch.setattr(app, "unindexed_playlists", set())
+    monkeypatch.setattr(app, "latest_listing", [])
+    return app
+
+
+def test_unreadable_playlists_do_not_hold_the_index_back(library, stub):
+    app = library
+    stub.playlists = {"readable": track_uris("l", 10)}
+    app.apply_playlist_listing(listing(readable="snapshot-r", followed="snapshot-f"))
+
+    app.run_async(fetch(app, "readable"), timeout=10)
+    assert not app.library_index_complete()
+    # The stub answers 404 for playlists it doesn't have
+    with pytest.raises(Exception):
+        app.run_async(fetch(app, "followed"), timeout=10)
+    assert app.library_index_complete()
+
+    state = app.app.test_client().get('/api/library-index').json
+    assert state["complete"]
+    assert state["indexed"] == 1
+    assert state["unreadable"] == [{"id": "followed", "name": "Followed", "status": 404}]
+
+    # Not skipped for good: a new snapshot gets another attempt
+    app.apply_playlist_listing(listing(readable="snapshot-r", followed="snapshot-f2"))
+    assert not app.library_index_complete()
+
+
+def test_playlists_that_left_the_library_are_dropped(library, stub):
+    app = library
+    uris = track_uris("k", 5)
+    stub.playlists = {"kept": uris, "deleted": uris}
+    app.apply_playlist_listing(listing(kept="snapshot-k", deleted="snapshot-d"))
+    app.run_async(fetch(app, "kept"), timeout=10)
+    app.run_async(fetch(app, "deleted"), timeout=10)
+    assert app.playlists_containing_anywhere(uris[0]) == {"kept", "deleted"}
+
+    app.apply_playlist_listing(listing(kept="snapshot-k"))
+    assert app.library_index_complete()
+    assert app.playlists_containing_anywhere(uris[0]) == {"kept"}
+    assert "deleted" not in app.cached_snapshots
+    with app.cache_db() as conn:
+        rows = conn.execute("SELECT 1 FROM playlist_tracks WHERE playlist_id = 'deleted'").fetchall()
+    assert rows == []
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+
+from conftest import track_uris
+from spotify_async import AsyncSpotify, SpotifyAsyncError, remaining_page_urls
+
+
+async def stub_token():
+    return "stub-token"
+
+
+def run(server, call, **kwargs):
+    async def main():
+        async with AsyncSpotify(stub_token, base_url=server.api_url, **kwargs) as client:
+            return await call(client)
+    return asyncio.run(main())
+
+
+def test_remaining_page_urls_from_total():
+    first = {"next": "https://api.spotify.com/v1/playlists/p/items?offset=100&limit=100&fields=x", "total": 350}
+    urls = remaining_page_urls(first)
+    assert [url.split("offset=")[1].split("&")[0] for url in urls] == ["100", "200", "300"]
+    assert all("limit=100" in url and "fields=x" in url for url in urls)
+
+
+def test_remaining_page_urls_without_enough_to_go_on():
+    assert remaining_page_urls({"next": None, "total": 20}) == []
+    assert remaining_page_urls({"next": "https://api.spotify.com/v1/me/playlists?offset=50&limit=50"}) is None
+    assert remaining_page_urls({"next": "https://api.spotify.com/v1/me/playlists?cursor=abc", "total": 70}) is None
+
+
+def test_pages_are_reassembled_in_order(stub):
+    stub.playlists = {f"pl{i:03d}": [] for i in range(130)}
+    stub.latency = 0.01
+    playlists = run(stub, lambda client: client.current_user_playlists())
+    assert [p["id"] for p in playlists] == list(stub.playlists)
+    # First page, then the other two at once
+    assert stub.request_count == 3
+    assert stub.max_in_flight == 2
+
+
+def test_client_can_be_reopened_on_another_loop(stub):
+    stub.playlists = {f"pl{i:03d}": [] for i in range(130)}
+    stub.latency = 0.01
+    client = AsyncSpotify(stub_token, base_url=stub.api_url, max_in_flight=1)
+
+    async def main():
+        async with client:
+            return await client.current_user_playlists()
+    # The two follow-up pages queue on the in-flight limit each time
+    assert len(asyncio.run(main())) == 130
+    assert len(asyncio.run(main())) == 130
+
+
+def test_playlist_track_uris_reads_every_page(stub):
+    uris = track_uris("a", 250)
+    stub.playlists = {"p": uris}
+    pages = {}
+    assert run(stub, lambda client: client.playlist_track_uris("p", pages)) == set(uris)
+    assert sorted(pages) == [0, 100, 200]
+    assert stub.request_count == 3
+
+
+def test_playlist_track_uris_resumes_from_partial_pages(stub):
+    uris = track_uris("b", 350)
+    stub.playlists = {"p": uris}
+    # Pages 100 and 200 were read by an attempt that failed part-way
+    pages = {100: uris[100:200], 200: uris[200:300]}
+    seen = []
+    result = run(stub, lambda client: client.playlist_track_uris("p", pages, on_page=seen.append))
+    assert result == set(uris)
+    # The first page (for the total) and the missing last one
+    assert stub.request_count == 2
+    assert sorted(len(page) for page in seen) == [50, 100]
+
+
+def test_playlist_track_uris_drops_pages_past_the_end(stub):
+    uris = track_uris("c", 150)
+    stub.playlists = {"p": uris}
+    # Kept from before the playlist shrank
+    pages = {100: uris[100:150], 200: track_uris("gone", 100)}
+    assert run(stub, lambda client: client.playlist_track_uris("p", pages)) == set(uris)
+    assert sorted(pages) == [0, 100]
+
+
+def test_429_backs_off_through_the_governor_and_retries(app_module, stub):
+    governor = app_module.RequestGovernor(app_module.TokenBucket(1000, 1000))
+    stub.playlists = {"p": track_uris("d", 10)}
+    stub.fail_with_429 = 1
+    stub.retry_after = 1
+    start = time.monotonic()
+    result = run(stub, lambda client: client.playlist_track_uris("p"), rate_limiter=governor)
+    assert result == set(stub.playlists["p"])
+    assert stub.request_count == 2
+    assert governor.rate_limited_count == 1
+    assert governor.last_retry_after == 1
+    # The retry waited out the Retry-After
+    assert time.monotonic() - start >= 1
+
+
+def test_429_with_a_long_retry_after_is_raised(app_module, stub):
+    governor = app_module.RequestGovernor(app_module.TokenBucket(1000, 1000))
+    stub.playlists = {"p": track_uris("e", 10)}
+    stub.fail_with_429 = 1
+    stub.retry_after = 120
+    with pytest.raises(SpotifyAsyncError) as error:
+        run(stub, lambda client: client.playlist_track_uris("p"), rate_limiter=governor, max_retry_after=60)
+    assert error.value.http_status == 429
+    assert stub.request_count == 1
+    # Everyone else still backs off for the full window
+    assert governor.pause_remaining() > 60
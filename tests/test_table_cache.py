@@ -0,0 +1,21 @@
+from conftest import track_uris
+
+
+def test_evicted_entries_are_read_back_from_disk(app_module):
+    cache = app_module.AlbumTracksCache(capacity=1)
+    first, second = track_uris("c", 3), track_uris("d", 2)
+    cache.put("cache-album1", first)
+    cache.put("cache-album2", second)
+    assert list(cache.entries) == ["cache-album2"]
+
+    assert cache.get("cache-album1") == first
+    assert cache.get("cache-album1") == first
+    assert cache.get("cache-album3") is None
+    assert list(cache.entries) == ["cache-album1"]
+    stats = cache.stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_colors_round_trip_as_tuples(app_module):
+    app_module.ColorCache(capacity=4).put("https://i.scdn.co/image/cache-test", (10, 20, 30))
+    assert app_module.ColorCache(capacity=4).get("https://i.scdn.co/image/cache-test") == (10, 20, 30)
@@ -0,0 +1,175 @@
+import pytest
+
+from conftest import track_uris
+from spotify_async import SpotifyAsyncError
+
+
+class FakeClient:
+    """Records playlist writes; the calls numbered in `rate_limited` (from 1) answer 429, those in `refused` 403."""
+
+    def __init__(self, rate_limited=(), refused=()):
+        self.rate_limited = set(rate_limited)
+        self.refused = set(refused)
+        self.calls = []
+
+    def _write(self, action, pid, uris):
+        self.calls.append((action, list(uris)))
+        if len(self.calls) in self.rate_limited:
+            raise SpotifyAsyncError(429, "API rate limit exceeded", {"Retry-After": "1"})
+        if len(self.calls) in self.refused:
+            raise SpotifyAsyncError(403, "Forbidden")
+        return {"snapshot_id": f"snapshot-{len(self.calls)}"}
+
+    def playlist_add_items(self, pid, uris):
+        return self._write("add", pid, uris)
+
+    def playlist_remove_all_occurrences_of_items(self, pid, uris):
+        return self._write("remove", pid, uris)
+
+    def current_user_saved_tracks_add(self, track_ids):
+        self._write("like", None, track_ids)
+
+    def current_user_saved_tracks_delete(self, track_ids):
+        self._write("unlike", None, track_ids)
+
+
+@pytest.fixture
+def write_queue(app_module):
+    # Long delay: the test flushes by hand
+    return app_module.WriteQueue(delay=3600)
+
+
+def sent(client, action):
+    return [uri for call_action, uris in client.calls if call_action == action for uri in uris]
+
+
+def test_429_requeues_only_the_batches_not_written(app_module, write_queue, monkeypatch):
+    uris = track_uris("w", 250)
+    client = FakeClient(rate_limited={2})
+    monkeypatch.setattr(app_module, "get_spotify", lambda: client)
+    write_queue.playlist_change("writes1", uris, "add")
+    write_queue.flush()
+    assert write_queue.playlist_ops == {"writes1": {uri: "add" for uri in uris[100:]}}
+
+    write_queue.flush()
+    assert sorted(sent(client, "add")) == sorted(uris + uris[100:200])
+    # Each track was added exactly once; the second batch was only attempted twice
+    assert [len(uris) for _, uris in client.calls] == [100, 100, 100, 50]
+    assert write_queue.playlist_ops == {}
+
+
+def test_429_on_the_adds_does_not_resend_the_removes(app_module, write_queue, monkeypatch):
+    removes = track_uris("r", 120)
+    adds = track_uris("a", 50)
+    client = FakeClient(rate_limited={3})
+    monkeypatch.setattr(app_module, "get_spotify", lambda: client)
+    write_queue.playlist_change("writes2", removes, "remove")
+    write_queue.playlist_change("writes2", adds, "add")
+    write_queue.flush()
+    assert write_queue.playlist_ops == {"writes2": {uri: "add" for uri in adds}}
+
+    write_queue.flush()
+    assert sent(client, "remove") == removes
+    assert [action for action, _ in client.calls] == ["remove", "remove", "add", "add"]
+
+
+def test_refused_changes_are_not_reapplied_to_the_refetched_copy(app_module, write_queue, monkeypatch):
+    uri = track_uris("x", 1)[0]
+    client = FakeClient(refused={1})
+    monkeypatch.setattr(app_module, "get_spotify", lambda: client)
+    monkeypatch.setattr(app_module, "playlist_state", app_module.PlaylistState(dashboard=[{"name": "Refused", "spotify_name": "Refused", "id": "writes3"}]))
+    refetched = []
+    # What a re-read finishing straight away would store
+    monkeypatch.setattr(app_module.cache_loader, "submit", lambda pid, sname, priority: refetched.append(write_queue.apply_pending(pid, set())))
+    write_queue.playlist_change("writes3", [uri], "add")
+    write_queue.flush()
+    assert refetched == [set()]
+    assert write_queue.failures[-1]["what"] == "changes to playlist Refused"
+
+
+def test_refused_likes_are_undone_in_the_mirror(app_module, write_queue, monkeypatch):
+    client = FakeClient(refused={1})
+    monkeypatch.setattr(app_module, "get_spotify", lambda: client)
+    app_module.record_liked(["liked1"], True)
+    app_module.record_liked(["unliked1"], False)
+    write_queue.like_change(["liked1"], True)
+    write_queue.like_change(["unliked1"], False)
+    write_queue.flush()
+    assert [action for action, _ in client.calls] == ["like", "unlike"]
+    # The like was refused, the unlike went through
+    assert "liked1" not in app_module.saved_track_ids
+    assert "unliked1" not in app_module.saved_track_ids
+
+    client.calls.clear()
+    client.refused = {1}
+    app_module.record_liked(["unliked2"], False)
+    write_queue.like_change(["unliked2"], False)
+    write_queue.flush()
+    assert "unliked2" in app_module.saved_track_ids
+
+
+def saved_row(app_module, pid):
+    with app_module.cache_db() as conn:
+        return conn.execute("SELECT snapshot_id, track_uris FROM playlist_tracks WHERE playlist_id = ?", (pid,)).fetchone()
+
+
+def test_playlist_is_saved_as_current_only_once_spotify_has_the_changes(app_module, monkeypatch):
+    before, added = track_uris("s", 2)
+    client = FakeClient()
+    monkeypatch.setattr(app_module, "get_spotify", lambda: client)
+    monkeypatch.setitem(app_module.playlist_snapshots, "writes4", "snapshot-0")
+    app_module.store_playlist_tracks("writes4", {before}, "snapshot-0")
+    assert saved_row(app_module, "writes4") == ("snapshot-0", before)
+
+    app_module.add_tracks_to_cache("writes4", [added])
+    app_module.write_queue.playlist_change("writes4", [added], "add")
+    # Saved meanwhile (e.g. by the loader): kept without a snapshot, so a restart reads it again
+    app_module.save_playlist_tracks("writes4")
+    assert saved_row(app_module, "writes4")[0] is None
+
+    app_module.write_queue.flush()
+    snapshot, saved = saved_row(app_module, "writes4")
+    assert snapshot == "snapshot-1"
+    assert set(saved.split("\n")) == {before, added}
+
+
+class LikedClient:
+    """Answers saved-tracks checks from `liked` and counts them."""
+
+    def __init__(self, liked):
+        self.liked = set(liked)
+        self.checks = 0
+
+    def current_user_saved_tracks_contains(self, track_ids):
+        self.checks += 1
+        return [track_id in self.liked for track_id in track_ids]
+
+
+@pytest.fixture
+def liked_mirror(app_module, monkeypatch):
+    monkeypatch.setattr(app_module, "saved_tracks_ready", True)
+    monkeypatch.setattr(app_module, "saved_track_ids", {"liked1", "liked2"})
+    monkeypatch.setattr(app_module, "liked_checked_track_id", None)
+    return app_module
+
+
+def test_unlike_from_another_app_shows_when_the_track_changes(liked_mirror, monkeypatch):
+    app = liked_mirror
+    client = LikedClient(liked={"liked2"})
+    monkeypatch.setattr(app, "get_spotify", lambda: client)
+    assert not app.check_track_liked("liked1")
+    assert "liked1" not in app.saved_track_ids
+    # Checked once per track, then answered from the mirror
+    client.liked.add("liked1")
+    assert not app.check_track_liked("liked1")
+    assert app.check_track_liked("liked2")
+    assert client.checks == 2
+
+
+def test_track_check_keeps_a_like_still_being_written(liked_mirror, monkeypatch):
+    app = liked_mirror
+    monkeypatch.setattr(app, "get_spotify", lambda: LikedClient(liked=()))
+    monkeypatch.setattr(app, "write_queue", app.WriteQueue(delay=3600))
+    app.write_queue.like_change(["liked1"], True)
+    assert app.check_track_liked("liked1")
+    assert "liked1" in app.saved_track_ids
@@ -0,0 +1,122 @@
+"""Spotify OAuth token held in memory and refreshed ahead of expiry.
+
+spotipy's SpotifyOAuth reads the token cache file on every get_cached_token()
+and get_access_token() call, and refreshes an expired token inside whichever
+request happens to notice. TokenManager reads the file once, answers from
+memory after that, and refreshes the token on a background thread
+`refresh_margin` seconds before `expires_at`, so neither request handlers nor
+API calls wait on the file or on a refresh. spotipy still writes refreshed
+tokens to the cache file, so the next start picks them up.
+"""
+import threading
+import time
+
+# spotipy treats a token with less than this left as expired
+EXPIRY_SLACK_SECONDS = 60
+
+
+class NotAuthenticated(Exception):
+    pass
+
+
+class TokenManager:
+    """Long-lived holder of the user's token.
+
+    `auth_manager_factory` builds the SpotifyOAuth used for the first read of the
+    cache file, refreshes and the authorization-code exchange; it is called once,
+    on first use. The manager also implements spotipy's auth_manager interface
+    (get_access_token), so a spotipy client built with `auth_manager=token_manager`
+    uses the in-memory token too.
+    """
+
+    def __init__(self, auth_manager_factory, refresh_margin=300, retry_seconds=30):
+        self.auth_manager_factory = auth_manager_factory
+        self.refresh_margin = refresh_margin
+        self.retry_seconds = retry_seconds
+        self._auth_manager = None
+        self.token_info = None
+        self.loaded = False
+        self.refreshes = 0
+        self.cond = threading.Condition(threading.RLock())
+        self.thread = None
+
+    @property
+    def auth_manager(self):
+        with self.cond:
+            if self._auth_manager is None:
+                self._auth_manager = self.auth_manager_factory()
+            return self._auth_manager
+
+    def cached(self):
+        """The in-memory token if it is still good, else None. No I/O and no lock."""
+        token_info = self.token_info
+        if token_info is not None and token_info['expires_at'] - time.time() > EXPIRY_SLACK_SECONDS:
+            return token_info
+        return None
+
+    def token(self):
+        """A valid token dict, or None if the user hasn't authorized the app.
+
+        The cache file is read only on the first call. The token is refreshed
+        here only if the background refresh hasn't kept up (e.g. it is failing).
+        """
+        token_info = self.cached()
+        if token_info is not None:
+            return token_info
+        with self.cond:
+            if not self.loaded:
+                auth_manager = self.auth_manager
+                self.token_info = auth_manager.validate_token(auth_manager.cache_handler.get_cached_token())
+                self.loaded = True
+                self.cond.notify_all()
+            elif self.token_info is not None and self.cached() is None:
+                self._refresh()
+            return self.token_info
+
+    def get_access_token(self, as_dict=False):
+        token_info = self.token()
+        if token_info is None:
+            raise NotAuthenticated("No Spotify token; log in first")
+        return token_info if as_dict else token_info['access_token']
+
+    def authorize(self, code):
+        """Exchange an authorization code (from the OAuth callback) and keep the new token."""
+        token_info = self.auth_manager.get_access_token(code, check_cache=False)
+        with self.cond:
+            self.token_info = token_info
+            self.loaded = True
+            self.cond.notify_all()
+        return token_info
+
+    def _refresh(self):
+        self.token_info = self.auth_manager.refresh_access_token(self.token_info['refresh_token'])
+        self.refreshes += 1
+
+    def start(self):
+        with self.cond:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True, name="token-refresh")
+                self.thread.start()
+
+    def _run(self):
+        while True:
+            failed = False
+            with self.cond:
+                try:
+                    if not self.loaded:
+                        self.token()
+                    if self.token_info is None:
+                        # Not authorized yet; authorize() wakes us
+                        self.cond.wait()
+                        continue
+                    wait = self.token_info['expires_at'] - self.refresh_margin - time.time()
+                    if wait > 0:
+                        self.cond.wait(wait)
+                        continue
+                    self._refresh()
+                    print(f"Spotify token refreshed (expires: {self.token_info['expires_at']})")
+                except Exception as e:
+                    print(f"Error refreshing Spotify token: {e}")
+                    failed = True
+            if failed:
+                time.sleep(self.retry_seconds)
@@ -0,0 +1,183 @@
+"""Compact in-memory store for playlist membership.
+
+Spotify track IDs are 22-character base62 strings encoding a 128-bit number.
+Instead of holding a `spotify:track:<id>` string per playlist entry, every
+track is decoded to its integer value and interned once, getting a small
+dense index. Each playlist is then a sorted `array('I')` of those indices
+(4 bytes per entry), and the reverse lookup (track -> playlists) is a tuple
+of playlist IDs per interned track.
+
+URIs that are not regular tracks (local files, episodes, malformed IDs) are
+interned by their string, so nothing is lost; they are just stored less
+compactly.
+
+TrackStore is not thread-safe; callers serialize access with their own lock.
+"""
+from array import array
+from bisect import bisect_left
+
+BASE62_ALPHABET = "0123456789abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ"
+BASE62_VALUES = {c: i for i, c in enumerate(BASE62_ALPHABET)}
+TRACK_URI_PREFIX = "spotify:track:"
+TRACK_ID_LENGTH = 22
+
+
+def decode_track_id(track_id):
+    """Decode a base62 track ID to its 128-bit integer, or None if it is not a valid ID."""
+    if len(track_id) != TRACK_ID_LENGTH:
+        return None
+    value = 0
+    try:
+        for c in track_id:
+            value = value * 62 + BASE62_VALUES[c]
+    except KeyError:
+        return None
+    if value >> 128:
+        return None
+    return value
+
+
+def encode_track_id(value):
+    """Inverse of decode_track_id."""
+    chars = []
+    for _ in range(TRACK_ID_LENGTH):
+        value, digit = divmod(value, 62)
+        chars.append(BASE62_ALPHABET[digit])
+    return "".join(reversed(chars))
+
+
+def track_key(uri):
+    """Interning key for a URI: the decoded integer for track URIs, the URI itself otherwise."""
+    if uri.startswith(TRACK_URI_PREFIX):
+        value = decode_track_id(uri[len(TRACK_URI_PREFIX):])
+        if value is not None:
+            return value
+    return uri
+
+
+class TrackStore:
+    """Playlist ID -> set of track URIs, stored as sorted arrays of interned track indices.
+
+    Supports `pid in store` and `len(store)` like the dict of sets it replaces.
+    Interned tracks are never released; the table only grows with the number of
+    distinct tracks seen, which is bounded by the user's library.
+    """
+
+    def __init__(self):
+        self._index_of = {}      # track key -> dense index
+        self._keys = []          # dense index -> track key
+        self._playlists_of = []  # dense index -> tuple of playlist IDs containing the track
+        self._tracks = {}        # playlist ID -> array('I') of sorted dense indices
+
+    def __contains__(self, pid):
+        return pid in self._tracks
+
+    def __len__(self):
+        return len(self._tracks)
+
+    def playlist_ids(self):
+        return list(self._tracks)
+
+    def track_count(self, pid):
+        return len(self._tracks.get(pid, ()))
+
+    def interned_count(self):
+        return len(self._keys)
+
+    def _intern(self, uri):
+        key = track_key(uri)
+        index = self._index_of.get(key)
+        if index is None:
+            index = len(self._keys)
+            self._index_of[key] = index
+            self._keys.append(key)
+            self._playlists_of.append(())
+        return index
+
+    def _lookup(self, uri):
+        return self._index_of.get(track_key(uri))
+
+    def _uri(self, index):
+        key = self._keys[index]
+        if isinstance(key, int):
+            return TRACK_URI_PREFIX + encode_track_id(key)
+        return key
+
+    def _link(self, index, pid):
+        pids = self._playlists_of[index]
+        if pid not in pids:
+            self._playlists_of[index] = pids + (pid,)
+
+    def _unlink(self, index, pid):
+        pids = self._playlists_of[index]
+        if pid in pids:
+            self._playlists_of[index] = tuple(p for p in pids if p != pid)
+
+    def ensure(self, pid):
+        """Create an empty entry for a playlist if it has none yet."""
+        if pid not in self._tracks:
+            self._tracks[pid] = array('I')
+
+    def discard(self, pid):
+        """Drop a playlist's entry, if it has one."""
+        for index in self._tracks.pop(pid, ()):
+            self._unlink(index, pid)
+
+    def set_tracks(self, pid, uris):
+        """Replace a playlist's tracks, re-linking only the tracks that changed."""
+        new = array('I', sorted({self._intern(uri) for uri in uris}))
+        old = self._tracks.get(pid, array('I'))
+        new_set = set(new)
+        old_set = set(old)
+        for index in old_set - new_set:
+            self._unlink(index, pid)
+        for index in new_set - old_set:
+            self._link(index, pid)
+        self._tracks[pid] = new
+
+    def add_tracks(self, pid, uris):
+        """Add tracks to an existing playlist entry. Returns False if the playlist is not stored."""
+        tracks = self._tracks.get(pid)
+        if tracks is None:
+            return False
+        for uri in uris:
+            index = self._intern(uri)
+            pos = bisect_left(tracks, index)
+            if pos == len(tracks) or tracks[pos] != index:
+                tracks.insert(pos, index)
+                self._link(index, pid)
+        return True
+
+    def remove_tracks(self, pid, uris):
+        """Remove tracks from an existing playlist entry. Returns False if the playlist is not stored."""
+        tracks = self._tracks.get(pid)
+        if tracks is None:
+            return False
+        for uri in uris:
+            index = self._lookup(uri)
+            if index is None:
+                continue
+            pos = bisect_left(tracks, index)
+            if pos < len(tracks) and tracks[pos] == index:
+                del tracks[pos]
+                self._unlink(index, pid)
+        return True
+
+    def contains(self, pid, uri):
+        tracks = self._tracks.get(pid)
+        index = self._lookup(uri)
+        if tracks is None or index is None:
+            return False
+        pos = bisect_left(tracks, index)
+        return pos < len(tracks) and tracks[pos] == index
+
+    def playlists_containing(self, uri):
+        """Tuple of playlist IDs whose stored tracks include the URI."""
+        index = self._lookup(uri)
+        if index is None:
+            return ()
+        return self._playlists_of[index]
+
+    def track_uris(self, pid):
+        """The playlist's tracks decoded back to URIs."""
+        return [self._uri(index) for index in self._tracks.get(pid, ())]